@@ -0,0 +1,24 @@
+"""Add clips.proxy_path for review proxies
+
+Revision ID: 0002_clip_proxy_path
+Revises: 0001_initial
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002_clip_proxy_path"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("clips", sa.Column("proxy_path", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("clips") as batch:
+        batch.drop_column("proxy_path")
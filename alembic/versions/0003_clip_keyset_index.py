@@ -0,0 +1,22 @@
+"""Add (project_id, score, id) index for keyset clip listings
+
+Revision ID: 0003_clip_keyset_index
+Revises: 0002_clip_proxy_path
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_clip_keyset_index"
+down_revision = "0002_clip_proxy_path"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_clips_project_score_id", "clips", ["project_id", "score", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_clips_project_score_id", table_name="clips")
@@ -0,0 +1,89 @@
+"""Move text, source_path, audio_energy and speech_markers out of clip metadata
+
+Revision ID: 0004_clip_feature_columns
+Revises: 0003_clip_keyset_index
+Create Date: 2026-10-18
+
+Adds typed columns for the metadata keys every handler reads and backfills
+them from the JSON blob in batches by primary key, leaving only the
+remaining free-form keys in `clips.metadata`. Downgrade folds them back.
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_clip_feature_columns"
+down_revision = "0003_clip_keyset_index"
+branch_labels = None
+depends_on = None
+
+FIELDS = ("text", "source_path", "audio_energy", "speech_markers")
+BATCH_SIZE = 5000
+
+
+def _batches(bind):
+    last = 0
+    select = sa.text(
+        "SELECT id, metadata, text, source_path, audio_energy, speech_markers "
+        "FROM clips WHERE id > :last ORDER BY id LIMIT :n"
+    )
+    while True:
+        rows = bind.execute(select, {"last": last, "n": BATCH_SIZE}).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _load(raw):
+    try:
+        md = json.loads(raw or "{}")
+    except ValueError:
+        return {}
+    return md if isinstance(md, dict) else {}
+
+
+def upgrade():
+    op.add_column("clips", sa.Column("text", sa.Text(), nullable=True))
+    op.add_column("clips", sa.Column("source_path", sa.String(), nullable=True))
+    op.add_column("clips", sa.Column("audio_energy", sa.Float(), nullable=True))
+    op.add_column("clips", sa.Column("speech_markers", sa.Integer(), nullable=True))
+    op.create_index("ix_clips_source_path", "clips", ["source_path"])
+
+    bind = op.get_bind()
+    update = sa.text(
+        "UPDATE clips SET text = :text, source_path = :source_path, "
+        "audio_energy = :audio_energy, speech_markers = :speech_markers, "
+        "metadata = :metadata WHERE id = :id"
+    )
+    for rows in _batches(bind):
+        params = []
+        for row in rows:
+            md = _load(row[1])
+            values = {name: md.pop(name, None) for name in FIELDS}
+            values["id"] = row[0]
+            values["metadata"] = json.dumps(md)
+            params.append(values)
+        bind.execute(update, params)
+
+
+def downgrade():
+    bind = op.get_bind()
+    update = sa.text("UPDATE clips SET metadata = :metadata WHERE id = :id")
+    for rows in _batches(bind):
+        params = []
+        for row in rows:
+            md = _load(row[1])
+            for name, value in zip(FIELDS, row[2:]):
+                if value is not None:
+                    md[name] = value
+            params.append({"id": row[0], "metadata": json.dumps(md)})
+        bind.execute(update, params)
+
+    op.drop_index("ix_clips_source_path", table_name="clips")
+    with op.batch_alter_table("clips") as batch:
+        for name in FIELDS:
+            batch.drop_column(name)
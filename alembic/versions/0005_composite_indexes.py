@@ -0,0 +1,28 @@
+"""Add composite indexes for approved-clip and per-user event queries
+
+Revision ID: 0005_composite_indexes
+Revises: 0004_clip_feature_columns
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_composite_indexes"
+down_revision = "0004_clip_feature_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_clips_project_approved", "clips", ["project_id", "approved"])
+    op.create_index(
+        "ix_events_user_type_created",
+        "events",
+        ["user_id", "event_type", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_events_user_type_created", table_name="events")
+    op.drop_index("ix_clips_project_approved", table_name="clips")
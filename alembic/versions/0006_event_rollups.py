@@ -0,0 +1,50 @@
+"""Add per-day event rollups for user and clip analytics
+
+Revision ID: 0006_event_rollups
+Revises: 0005_composite_indexes
+Create Date: 2026-10-18
+
+Creates the rollup tables `db.record_event` keeps up to date and fills them
+from the existing events, so `get_user_analytics` reads them right away.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006_event_rollups"
+down_revision = "0005_composite_indexes"
+branch_labels = None
+depends_on = None
+
+ROLLUPS = (
+    ("event_rollups_user_daily", "user_id", sa.Integer()),
+    ("event_rollups_clip_daily", "clip_id", sa.String()),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, key, key_type in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column(key, key_type, primary_key=True),
+            sa.Column("event_type", sa.String(), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("value_sum", sa.Float(), nullable=False),
+        )
+        bind.execute(
+            sa.text(
+                f"INSERT INTO {table} ({key}, event_type, day, count, value_sum) "
+                f"SELECT {key}, event_type, date(created_at), count(id), "
+                "coalesce(sum(value), 0.0) FROM events "
+                f"WHERE {key} IS NOT NULL "
+                f"GROUP BY {key}, event_type, date(created_at)"
+            )
+        )
+
+
+def downgrade():
+    for table, _, _ in ROLLUPS:
+        op.drop_table(table)
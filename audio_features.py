@@ -0,0 +1,432 @@
+"""Whole-track audio features, sliced per segment.
+
+`process_audio_for_project` used to run librosa separately on every
+transcript segment (RMS for the energy, RMS again for the speech markers,
+RMS, ZCR and onset strength in the emotion classifier). Here the frame-level
+features are computed once for the whole track and every segment reads a
+slice of them.
+
+Frames use the same layout as librosa's defaults (2048-sample frames, hop
+512, centered), so per-segment values match the old per-slice librosa calls
+except within half a frame of the segment edges, where the whole-track frames
+see the neighbouring audio instead of zero padding.
+
+`stream_track_features` produces the same frames from an ffmpeg pipe, decoding
+mono float32 at `ANALYSIS_SR` in fixed-size blocks; only one block plus one
+frame of overlap is ever held in memory, however long the source is.
+
+`analyze_segments` can shard segments across a process pool; the workers map
+the frame arrays from shared memory instead of receiving pickled copies.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from emotion_classifier import classify_batch, classify_from_features
+from ffmpeg_progress import FFmpegError
+
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+# sample rate audio is decoded at for analysis (librosa's default rate)
+ANALYSIS_SR = int(os.environ.get("CLIPFORGE_ANALYSIS_SR", "22050"))
+# seconds of audio decoded per block in streaming mode
+STREAM_BLOCK_SECONDS = float(os.environ.get("CLIPFORGE_STREAM_BLOCK_SECONDS", "60"))
+# processes for per-segment analysis; 1 = serial, 0 = one per core
+ANALYSIS_WORKERS = int(os.environ.get("CLIPFORGE_ANALYSIS_WORKERS", "1"))
+# below this many segments the pool costs more than it saves
+PARALLEL_MIN_SEGMENTS = 2000
+# frames per block when reducing the strided frame view; bounds the
+# temporary memory to a few tens of MB regardless of track length
+_BLOCK_FRAMES = 4096
+# librosa.zero_crossings treats |y| <= threshold as zero
+_ZC_THRESHOLD = 1e-10
+# librosa.amplitude_to_db floor
+_AMIN = 1e-5
+
+# silences: (n, 2) array of silent [start, end) seconds, when computed
+TrackFeatures = namedtuple(
+    "TrackFeatures",
+    ["rms", "zcr", "onset", "sr", "hop_length", "n_samples", "silences"],
+    defaults=(None,),
+)
+# silence: frames this far below the track's loudest frame, for at least
+# SILENCE_MIN_SECONDS
+SILENCE_TOP_DB = 40
+SILENCE_MIN_SECONDS = 0.3
+
+
+def _frame_view(x, frame_length, hop_length):
+    windows = np.lib.stride_tricks.sliding_window_view(x, frame_length)
+    return windows[::hop_length]
+
+
+def _blockwise(frames, reducer):
+    out = np.empty(frames.shape[0], dtype=np.float64)
+    for i in range(0, frames.shape[0], _BLOCK_FRAMES):
+        out[i : i + _BLOCK_FRAMES] = reducer(frames[i : i + _BLOCK_FRAMES])
+    return out
+
+
+def _rms_frames(padded, frame_length, hop_length):
+    frames = _frame_view(padded, frame_length, hop_length)
+    return _blockwise(
+        frames,
+        lambda b: np.sqrt(np.mean(np.square(b, dtype=np.float64), axis=1)),
+    )
+
+
+def _zcr_frames(padded, frame_length, hop_length):
+    # a crossing is a sign change; values at the threshold count as positive
+    sign = np.signbit(np.where(np.abs(padded) <= _ZC_THRESHOLD, 0, padded))
+    frames = _frame_view(sign, frame_length, hop_length)
+    return _blockwise(
+        frames,
+        lambda b: np.count_nonzero(b[:, 1:] != b[:, :-1], axis=1) / frame_length,
+    )
+
+
+def frame_rms(y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH):
+    """Centered frame RMS, as `librosa.feature.rms` (zero padded)."""
+    padded = np.pad(y, frame_length // 2, mode="constant")
+    return _rms_frames(padded, frame_length, hop_length)
+
+
+def frame_zcr(y, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH):
+    """Centered frame zero-crossing rate, as `librosa.feature.zero_crossing_rate`."""
+    padded = np.pad(y, frame_length // 2, mode="edge")
+    return _zcr_frames(padded, frame_length, hop_length)
+
+
+def compute_track_features(y, sr, onset=False):
+    """Frame-level RMS and ZCR (and optionally the onset envelope) of `y`.
+
+    onset: also compute librosa's onset strength envelope; only needed for
+    tempo estimates, which the current scoring does not use.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    onset_env = None
+    if onset and len(y):
+        import librosa
+
+        onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=HOP_LENGTH)
+    return TrackFeatures(
+        rms=frame_rms(y) if len(y) else np.zeros(0),
+        zcr=frame_zcr(y) if len(y) else np.zeros(0),
+        onset=onset_env,
+        sr=sr,
+        hop_length=HOP_LENGTH,
+        n_samples=len(y),
+    )
+
+
+class _FrameStream:
+    """Frames of a centered, padded signal that arrives in blocks.
+
+    Samples that later frames still need (less than one frame) are carried
+    over to the next block, so block edges give exactly the frames of the
+    whole signal.
+    """
+
+    def __init__(self, reducer, pad_mode, frame_length, hop_length):
+        self.reducer = reducer
+        self.pad_mode = pad_mode
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.carry = None
+        self.out = []
+
+    def _pad(self, edge_value):
+        value = edge_value if self.pad_mode == "edge" else 0.0
+        return np.full(self.frame_length // 2, value, dtype=np.float32)
+
+    def push(self, block, final=False):
+        if self.carry is None:
+            first = block[0] if len(block) else 0.0
+            self.carry = self._pad(first)
+        buf = np.concatenate([self.carry, block])
+        if final:
+            last = buf[-1] if len(buf) > self.frame_length // 2 else 0.0
+            buf = np.concatenate([buf, self._pad(last)])
+        n = 0
+        if len(buf) >= self.frame_length:
+            n = (len(buf) - self.frame_length) // self.hop_length + 1
+            self.out.append(
+                self.reducer(
+                    buf[: (n - 1) * self.hop_length + self.frame_length],
+                    self.frame_length,
+                    self.hop_length,
+                )
+            )
+        self.carry = buf[n * self.hop_length :]
+
+    def result(self):
+        return np.concatenate(self.out) if self.out else np.zeros(0)
+
+
+def _decode_cmd(path, sr):
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "-f",
+        "f32le",
+        "pipe:1",
+    ]
+
+
+def stream_track_features(path, sr=None, block_seconds=None):
+    """`compute_track_features` for a file, decoded through an ffmpeg pipe.
+
+    Audio is downmixed to mono and resampled to `sr` (default ANALYSIS_SR),
+    then processed `block_seconds` at a time. Raises FFmpegError when ffmpeg
+    cannot decode the file.
+    """
+    sr = sr or ANALYSIS_SR
+    block_bytes = int((block_seconds or STREAM_BLOCK_SECONDS) * sr) * 4
+    rms = _FrameStream(_rms_frames, "constant", FRAME_LENGTH, HOP_LENGTH)
+    zcr = _FrameStream(_zcr_frames, "edge", FRAME_LENGTH, HOP_LENGTH)
+    proc = subprocess.Popen(
+        _decode_cmd(path, sr), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    tail = deque(maxlen=20)
+
+    def _drain_stderr():
+        for line in proc.stderr:
+            tail.append(line.decode("utf-8", "replace").rstrip())
+
+    reader = threading.Thread(target=_drain_stderr, daemon=True)
+    reader.start()
+
+    n_samples = 0
+    pending = b""
+    try:
+        while True:
+            data = proc.stdout.read(block_bytes)
+            if not data:
+                break
+            data = pending + data
+            # keep a partial float for the next read
+            cut = len(data) - len(data) % 4
+            pending = data[cut:]
+            block = np.frombuffer(data[:cut], dtype="<f4")
+            n_samples += len(block)
+            rms.push(block)
+            zcr.push(block)
+    finally:
+        returncode = proc.wait()
+        reader.join(timeout=5)
+    if returncode != 0:
+        raise FFmpegError(returncode, "\n".join(tail))
+    if n_samples == 0:
+        return compute_track_features(np.zeros(0, dtype=np.float32), sr)
+    empty = np.zeros(0, dtype=np.float32)
+    rms.push(empty, final=True)
+    zcr.push(empty, final=True)
+    return TrackFeatures(
+        rms=rms.result(),
+        zcr=zcr.result(),
+        onset=None,
+        sr=sr,
+        hop_length=HOP_LENGTH,
+        n_samples=n_samples,
+    )
+
+
+def load_track_features(path):
+    """Whole-track features of an audio/video file with bounded memory.
+
+    Streams through ffmpeg when it is installed; otherwise falls back to
+    decoding the whole file with librosa at ANALYSIS_SR.
+    """
+    if shutil.which("ffmpeg"):
+        return stream_track_features(path)
+    import librosa
+
+    y, sr = librosa.load(path, sr=ANALYSIS_SR)
+    return compute_track_features(y, sr)
+
+
+def frame_range(track, start, end):
+    """Whole-track frames covering the samples of [start, end).
+
+    A slice of n samples analysed on its own has 1 + n // hop centered frames;
+    take as many whole-track frames, starting at the one centered nearest to
+    the slice start.
+    """
+    s = min(max(0, int(start * track.sr)), track.n_samples)
+    e = min(max(s, int(end * track.sr)), track.n_samples)
+    if e <= s:
+        return 0, 0
+    lo = int(round(s / track.hop_length))
+    hi = min(len(track.rms), lo + 1 + (e - s) // track.hop_length)
+    return min(lo, hi), hi
+
+
+def count_non_silent(rms, top_db=30):
+    """Number of non-silent runs, as `len(librosa.effects.split(...))`.
+
+    Loudness is relative to the loudest frame of `rms` (ref=np.max), so pass
+    the frames of one segment to get that segment's speech markers.
+    """
+    if len(rms) == 0:
+        return 0
+    # split() applies amplitude_to_db to the frame RMS
+    db = 20.0 * np.log10(np.maximum(_AMIN, rms))
+    db -= 20.0 * np.log10(max(_AMIN, float(rms.max())))
+    loud = (db > -top_db).astype(np.int8)
+    # a run starts wherever loud goes 0 -> 1 (including at frame 0)
+    return int(np.count_nonzero(np.diff(loud, prepend=0) == 1))
+
+
+def silent_intervals(track, top_db=SILENCE_TOP_DB, min_seconds=SILENCE_MIN_SECONDS):
+    """Silent stretches of the whole track as an (n, 2) array of seconds."""
+    rms = track.rms
+    if len(rms) == 0:
+        return np.zeros((0, 2))
+    db = 20.0 * np.log10(np.maximum(_AMIN, rms))
+    quiet = db <= 20.0 * np.log10(max(_AMIN, float(rms.max()))) - top_db
+    edges = np.diff(quiet.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    seconds = np.stack([starts, ends], axis=1) * track.hop_length / float(track.sr)
+    seconds = np.minimum(seconds, track.n_samples / float(track.sr))
+    return seconds[seconds[:, 1] - seconds[:, 0] >= min_seconds]
+
+
+def segment_features(track, start, end, top_db=30):
+    """Features of one segment, read from the whole-track frames."""
+    lo, hi = frame_range(track, start, end)
+    if hi <= lo:
+        return {"audio_energy": 0.0, "zcr": 0.0, "speech_markers": 0, "empty": True}
+    rms = track.rms[lo:hi]
+    out = {
+        "audio_energy": float(rms.mean()),
+        "zcr": float(track.zcr[lo:hi].mean()),
+        "speech_markers": count_non_silent(rms, top_db=top_db),
+        "empty": False,
+    }
+    if track.onset is not None:
+        out["onset_strength"] = float(track.onset[lo:hi].mean())
+    return out
+
+
+def segments_features(track, segments, top_db=30):
+    """`segment_features` for every {"start", "end"} dict, in order."""
+    return [
+        segment_features(track, s.get("start", 0.0), s.get("end", 0.0), top_db=top_db)
+        for s in segments
+    ]
+
+
+def analyze_segment(track, start, end):
+    """`segment_features` plus the emotion label of one segment."""
+    feats = segment_features(track, start, end)
+    feats["emotion"] = (
+        "unknown"
+        if feats["empty"]
+        else classify_from_features(rms=feats["audio_energy"], zcr=feats["zcr"])
+    )
+    return feats
+
+
+def _share(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    # pool workers share the parent's resource tracker, which unlinks the
+    # segment once the parent does
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+_worker_track = None
+_worker_shms = []
+
+
+def _init_worker(specs, sr, hop_length, n_samples):
+    global _worker_track
+    arrays = {}
+    for field, spec in specs.items():
+        if spec is None:
+            arrays[field] = None
+            continue
+        shm, arrays[field] = _attach(spec)
+        _worker_shms.append(shm)
+    _worker_track = TrackFeatures(
+        sr=sr, hop_length=hop_length, n_samples=n_samples, **arrays
+    )
+
+
+def _analyze_bounds(track, bounds):
+    # analyze_segment for many segments, labelled in one classify_batch call
+    feats = [segment_features(track, start, end) for start, end in bounds]
+    labels = classify_batch(
+        [np.nan if f["empty"] else f["audio_energy"] for f in feats],
+        [f["zcr"] for f in feats],
+    )
+    for f, label in zip(feats, labels):
+        f["emotion"] = label
+    return feats
+
+
+def _analyze_chunk(bounds):
+    return _analyze_bounds(_worker_track, bounds)
+
+
+def analyze_segments(track, bounds, workers=None):
+    """`analyze_segment` for every (start, end) pair, in order.
+
+    workers: processes to shard the segments over (default ANALYSIS_WORKERS,
+    0 = one per core). Results are identical to the serial path.
+    """
+    workers = ANALYSIS_WORKERS if workers is None else workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(bounds) < PARALLEL_MIN_SEGMENTS:
+        return _analyze_bounds(track, bounds)
+
+    shms = []
+    specs = {}
+    try:
+        for field in ("rms", "zcr", "onset"):
+            arr = getattr(track, field)
+            if arr is None:
+                specs[field] = None
+                continue
+            shm, specs[field] = _share(np.ascontiguousarray(arr))
+            shms.append(shm)
+        # a few chunks per worker so uneven segments still balance
+        size = -(-len(bounds) // (workers * 4))
+        chunks = [bounds[i : i + size] for i in range(0, len(bounds), size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(specs, track.sr, track.hop_length, track.n_samples),
+        ) as ex:
+            results = []
+            for part in ex.map(_analyze_chunk, chunks):
+                results.extend(part)
+        return results
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
@@ -1,15 +1,26 @@
 """Process audio/video into scored clips for a project.
 
 Functions:
-- process_audio_for_project(audio_path, project_id)
+- process_audio_for_project(audio_path, project_id, source_path=None)
 
-This module uses `transcription.transcribe` (Whisper) and `librosa` for audio features.
+This module uses `transcription.transcribe_cached` (Whisper) and `librosa` for audio features.
+Features are computed once for the whole track (see `audio_features`) and
+sliced per segment; the audio is streamed through ffmpeg in blocks at the
+analysis sample rate, so memory stays bounded on multi-hour sources. The
+arrays are kept in `feature_store`, so re-analysing a source skips the decode.
+With `windows` (or CLIPFORGE_CLIP_WINDOWS=1) clips are the best sliding
+windows over the segment timeline (`clip_windows`) instead of one per segment.
 """
 
-from transcription import transcribe
+import os
+
+from transcription import transcribe_cached
 import librosa
 import numpy as np
-from emotion_classifier import classify
+from audio_features import analyze_segments
+from feature_store import get_track_features
+from clipscoring import viral_scores
+from clip_windows import window_candidates
 import db
 
 
@@ -26,57 +37,113 @@ def detect_speech_markers(y, sr):
 
 
 def viral_score_calc(emotion_label, audio_energy, speech_markers, duration):
-    # Reuse weighted scoring idea — map emotion to weight
-    emotion_weights = {
-        "funny": 1.2,
-        "intense": 1.3,
-        "cringe": 0.7,
-        "emotional": 1.1,
-    }
-    e_w = emotion_weights.get(emotion_label, 1.0)
-    score = 0
-    score += e_w * 0.4
-    score += min(audio_energy * 10, 1.0) * 0.3
-    score += min(speech_markers / max(1, duration), 1.0) * 0.2
-    score += min(duration / 10.0, 1.0) * 0.1
-    # Normalize to 0-100
-    return round(score * 100, 2)
-
-
-def process_audio_for_project(audio_path: str, project_id: int):
-    # transcribe -> get segments with start/end
-    segments = transcribe(audio_path)
-    # load audio
-    y, sr = librosa.load(audio_path, sr=None)
+    # single-clip form of clipscoring.viral_scores (also used for rescoring)
+    return float(
+        viral_scores([emotion_label], [audio_energy], [speech_markers], [duration])[0]
+    )
+
+
+def process_audio_for_project(
+    audio_path: str,
+    project_id: int,
+    source_path: str = None,
+    proxies: bool = True,
+    workers: int = None,
+    windows: bool = None,
+):
+    """Score the transcript segments of `audio_path` into clips.
+
+    source_path: the video the audio came from; stored on each clip so it can
+    be rendered. With `proxies`, low-resolution review renders of every new
+    clip are queued once scoring is done. workers: processes for segment
+    analysis (see `audio_features.analyze_segments`). windows: build clips
+    from scored multi-segment windows; defaults to CLIPFORGE_CLIP_WINDOWS.
+    """
+    # frame-level RMS/ZCR once for the whole track (or from the feature
+    # store when this audio was analysed before); segments read slices
+    track = get_track_features(audio_path)
+    # transcribe -> get segments with start/end (from the transcript cache
+    # when this audio was transcribed before); long audio is split at the
+    # track's silences when chunked transcription is enabled
+    segments = transcribe_cached(audio_path, track=track)
+    if windows is None:
+        windows = os.environ.get("CLIPFORGE_CLIP_WINDOWS", "0") == "1"
+    if windows:
+        records = _window_records(track, segments, project_id, source_path)
+    else:
+        records = _segment_records(track, segments, project_id, source_path, workers)
 
+    # one transaction for the whole video instead of a commit per clip
     session = db.SessionLocal()
     try:
-        for i, seg in enumerate(segments):
-            start = seg.get("start", 0.0)
-            end = seg.get("end", start + 1.0)
-            # extract audio slice
-            s_frame = int(start * sr)
-            e_frame = int(end * sr)
-            audio_slice = y[s_frame:e_frame]
-
-            audio_energy = (
-                compute_audio_energy(audio_slice) if len(audio_slice) > 0 else 0.0
-            )
-            speech_markers = (
-                detect_speech_markers(audio_slice, sr) if len(audio_slice) > 0 else 0
-            )
-            emotion = classify(audio_slice, sr) if len(audio_slice) > 0 else "unknown"
-            duration = end - start
-            score = viral_score_calc(emotion, audio_energy, speech_markers, duration)
-
-            clip_id = f"{project_id}-{i}-{int(start * 1000)}"
-            metadata = {
-                "text": seg.get("text", ""),
-                "audio_energy": audio_energy,
-                "speech_markers": speech_markers,
-            }
-            db.create_clip(
-                session, project_id, clip_id, start, end, score, emotion, metadata
-            )
+        db.bulk_upsert_clips(session, project_id, records)
     finally:
         session.close()
+    clip_ids = [r["clip_id"] for r in records]
+
+    if proxies and source_path and clip_ids:
+        # imported here: projects pulls in the web and queue stack
+        from projects import enqueue_proxy_renders
+
+        enqueue_proxy_renders(project_id, clip_ids)
+
+
+def _window_records(track, segments, project_id, source_path):
+    records = []
+    for cand in window_candidates(track, segments):
+        metadata = {
+            "text": cand["text"],
+            "audio_energy": cand["audio_energy"],
+            "speech_markers": cand["speech_markers"],
+            "segments": cand["segments"],
+        }
+        if source_path:
+            metadata["source_path"] = source_path
+        start, end = cand["start"], cand["end"]
+        records.append(
+            {
+                # keyed by span so re-ingesting updates the same window
+                "clip_id": f"{project_id}-w-{int(start * 1000)}-{int(end * 1000)}",
+                "start": start,
+                "end": end,
+                "score": cand["score"],
+                "emotion": cand["emotion"],
+                "metadata": metadata,
+            }
+        )
+    return records
+
+
+def _segment_records(track, segments, project_id, source_path, workers):
+    bounds = []
+    for seg in segments:
+        start = seg.get("start", 0.0)
+        bounds.append((start, seg.get("end", start + 1.0)))
+    analyses = analyze_segments(track, bounds, workers=workers)
+
+    records = []
+    for i, (seg, (start, end), feats) in enumerate(zip(segments, bounds, analyses)):
+        audio_energy = feats["audio_energy"]
+        speech_markers = feats["speech_markers"]
+        emotion = feats["emotion"]
+        duration = end - start
+        score = viral_score_calc(emotion, audio_energy, speech_markers, duration)
+
+        metadata = {
+            "text": seg.get("text", ""),
+            "audio_energy": audio_energy,
+            "speech_markers": speech_markers,
+        }
+        if source_path:
+            metadata["source_path"] = source_path
+        records.append(
+            {
+                "clip_id": f"{project_id}-{i}-{int(start * 1000)}",
+                "start": start,
+                "end": end,
+                "score": score,
+                "emotion": emotion,
+                "metadata": metadata,
+            }
+        )
+    return records
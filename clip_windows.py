@@ -0,0 +1,187 @@
+"""Candidate clips from sliding windows over the transcript timeline.
+
+Whisper segments are usually a few seconds long, shorter than a useful
+short. Every run of consecutive segments whose span lies within
+[min_seconds, max_seconds] is a candidate window; its energy, ZCR and
+speech markers come from prefix sums over the whole-track frames of
+`audio_features.TrackFeatures`, so each window costs O(1) whatever its
+length, and all windows are scored at once with `clipscoring.viral_scores`.
+Overlapping candidates are then suppressed greedily, best score first.
+
+Speech markers of a window count non-silent runs against a track-level
+reference (the loudest frame of the whole track) rather than the window's
+own loudest frame as per-segment analysis does; a per-window reference
+cannot be read off a prefix sum.
+"""
+
+import bisect
+import os
+
+import numpy as np
+
+from clipscoring import viral_scores
+from emotion_classifier import classify_batch
+
+MIN_SECONDS = float(os.environ.get("CLIPFORGE_WINDOW_MIN_SECONDS", "15"))
+MAX_SECONDS = float(os.environ.get("CLIPFORGE_WINDOW_MAX_SECONDS", "60"))
+# a candidate is dropped when it shares more than this fraction of the
+# shorter of itself and an already kept window
+MAX_OVERLAP = 0.25
+MARKER_TOP_DB = 30
+_AMIN = 1e-5
+
+
+def _prefix(x):
+    out = np.zeros(len(x) + 1, dtype=np.float64)
+    np.cumsum(x, out=out[1:])
+    return out
+
+
+def window_bounds(starts, ends, min_seconds=None, max_seconds=None):
+    """Index pairs (i, j) of every window from segment i to segment j whose
+    span ends[j] - starts[i] is within the bounds. `ends` must be sorted."""
+    min_seconds = MIN_SECONDS if min_seconds is None else min_seconds
+    max_seconds = MAX_SECONDS if max_seconds is None else max_seconds
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    idx = np.arange(len(starts))
+    j_lo = np.maximum(np.searchsorted(ends, starts + min_seconds, "left"), idx)
+    j_hi = np.searchsorted(ends, starts + max_seconds, "right")
+    counts = np.maximum(j_hi - j_lo, 0)
+    first = np.repeat(idx, counts)
+    # position of each window within its start segment's run
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return first, np.repeat(j_lo, counts) + offsets
+
+
+def window_features(track, w_start, w_end, top_db=MARKER_TOP_DB):
+    """Energy, ZCR and speech markers of many [start, end) spans at once."""
+    n_frames = len(track.rms)
+    if n_frames == 0:
+        zeros = np.zeros(len(w_start))
+        return {
+            "audio_energy": zeros,
+            "zcr": zeros,
+            "speech_markers": zeros.astype(np.int64),
+            "empty": np.ones(len(w_start), dtype=bool),
+        }
+    s = np.clip((np.asarray(w_start) * track.sr).astype(np.int64), 0, track.n_samples)
+    e = np.clip((np.asarray(w_end) * track.sr).astype(np.int64), s, track.n_samples)
+    # same frame selection as audio_features.frame_range
+    lo = np.rint(s / track.hop_length).astype(np.int64)
+    hi = np.minimum(n_frames, lo + 1 + (e - s) // track.hop_length)
+    lo = np.minimum(lo, hi)
+    n = np.maximum(hi - lo, 1)
+
+    rms = np.asarray(track.rms, dtype=np.float64)
+    rms_p = _prefix(rms)
+    zcr_p = _prefix(np.asarray(track.zcr, dtype=np.float64))
+    energy = (rms_p[hi] - rms_p[lo]) / n
+    zcr = (zcr_p[hi] - zcr_p[lo]) / n
+
+    peak = float(rms.max()) if n_frames else 0.0
+    db = 20.0 * np.log10(np.maximum(_AMIN, rms))
+    loud = db > 20.0 * np.log10(max(_AMIN, peak)) - top_db
+    run_starts = _prefix(loud & ~np.concatenate(([False], loud[:-1])))
+    # runs starting inside (lo, hi) plus one if the window opens mid-run
+    markers = run_starts[hi] - run_starts[np.minimum(lo + 1, hi)]
+    markers += np.where(hi > lo, loud[np.minimum(lo, max(n_frames - 1, 0))], 0)
+    empty = hi <= lo
+    return {
+        "audio_energy": np.where(empty, 0.0, energy),
+        "zcr": np.where(empty, 0.0, zcr),
+        "speech_markers": np.where(empty, 0, markers).astype(np.int64),
+        "empty": empty,
+    }
+
+
+def _clashes(s, e, kept_starts, kept_ends, pos, max_overlap):
+    def too_close(m):
+        ks, ke = kept_starts[m], kept_ends[m]
+        return min(e, ke) - max(s, ks) > max_overlap * min(e - s, ke - ks)
+
+    # no kept window contains another, so ends are sorted like starts and
+    # only neighbours still reaching into [s, e) need checking
+    m = pos - 1
+    while m >= 0 and kept_ends[m] > s:
+        if too_close(m):
+            return True
+        m -= 1
+    m = pos
+    while m < len(kept_starts) and kept_starts[m] < e:
+        if too_close(m):
+            return True
+        m += 1
+    return False
+
+
+def suppress_overlaps(w_start, w_end, scores, max_overlap=MAX_OVERLAP, top_k=None):
+    """Indices of windows kept by greedy non-maximum suppression, best first."""
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    kept, kept_starts, kept_ends = [], [], []
+    for k in order:
+        s, e = float(w_start[k]), float(w_end[k])
+        pos = bisect.bisect_left(kept_starts, s)
+        if _clashes(s, e, kept_starts, kept_ends, pos, max_overlap):
+            continue
+        kept_starts.insert(pos, s)
+        kept_ends.insert(pos, e)
+        kept.append(int(k))
+        if top_k and len(kept) >= top_k:
+            break
+    return kept
+
+
+def window_candidates(
+    track,
+    segments,
+    min_seconds=None,
+    max_seconds=None,
+    max_overlap=MAX_OVERLAP,
+    top_k=None,
+    weights=None,
+):
+    """Best non-overlapping windows over `segments` ({"start", "end", "text"}).
+
+    Returns dicts with start, end, score, emotion, audio_energy,
+    speech_markers, text and the segment index range, best score first.
+    """
+    if not segments:
+        return []
+    starts = np.array([seg.get("start", 0.0) for seg in segments], dtype=float)
+    ends = np.array([seg.get("end", 0.0) for seg in segments], dtype=float)
+    # the timeline must be ordered by end for the window search
+    order = np.argsort(ends, kind="stable")
+    starts, ends = starts[order], ends[order]
+    first, last = window_bounds(starts, ends, min_seconds, max_seconds)
+    if len(first) == 0:
+        return []
+    w_start, w_end = starts[first], ends[last]
+    feats = window_features(track, w_start, w_end)
+    rms = np.where(feats["empty"], np.nan, feats["audio_energy"])
+    emotions = classify_batch(rms, feats["zcr"])
+    scores = viral_scores(
+        emotions,
+        feats["audio_energy"],
+        feats["speech_markers"],
+        w_end - w_start,
+        weights=weights,
+    )
+    out = []
+    for k in suppress_overlaps(w_start, w_end, scores, max_overlap, top_k):
+        i, j = int(first[k]), int(last[k])
+        out.append(
+            {
+                "start": float(w_start[k]),
+                "end": float(w_end[k]),
+                "score": float(scores[k]),
+                "emotion": str(emotions[k]),
+                "audio_energy": float(feats["audio_energy"][k]),
+                "speech_markers": int(feats["speech_markers"][k]),
+                "text": " ".join(
+                    str(segments[o].get("text", "")).strip() for o in order[i : j + 1]
+                ).strip(),
+                "segments": [int(order[i]), int(order[j])],
+            }
+        )
+    return out
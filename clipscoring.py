@@ -1,3 +1,14 @@
+import numpy as np
+
+# multiplier per emotion label in viral_scores; unknown labels weigh 1.0
+EMOTION_WEIGHTS = {
+    "funny": 1.2,
+    "intense": 1.3,
+    "cringe": 0.7,
+    "emotional": 1.1,
+}
+
+
 def score_clip(clip):
     score = 0
     score += clip.get("emotion", 0) * 0.3
@@ -6,3 +17,25 @@ def score_clip(clip):
     score += clip.get("context_score", 0) * 0.15
     score += clip.get("pacing", 0) * 0.15
     return round(score * 100)
+
+
+def viral_scores(emotions, audio_energy, speech_markers, durations, weights=None):
+    """Vectorized viral score (0-100) over arrays of clip features.
+
+    weights: emotion label -> multiplier, defaults to EMOTION_WEIGHTS.
+    """
+    weights = EMOTION_WEIGHTS if weights is None else weights
+    labels, inverse = np.unique(
+        np.asarray([str(e) for e in emotions], dtype=object), return_inverse=True
+    )
+    e_w = np.array([weights.get(label, 1.0) for label in labels], dtype=float)
+    e_w = e_w[inverse] if len(labels) else np.zeros(0)
+    energy = np.asarray(audio_energy, dtype=float)
+    markers = np.asarray(speech_markers, dtype=float)
+    durations = np.asarray(durations, dtype=float)
+    score = e_w * 0.4
+    score += np.minimum(energy * 10, 1.0) * 0.3
+    score += np.minimum(markers / np.maximum(1, durations), 1.0) * 0.2
+    score += np.minimum(durations / 10.0, 1.0) * 0.1
+    # Normalize to 0-100
+    return np.round(score * 100, 2)
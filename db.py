@@ -1,6 +1,8 @@
 import os
 from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime
+from sqlalchemy import Date, Index, tuple_
 from sqlalchemy.orm import sessionmaker, declarative_base
+import base64
 import datetime
 import json
 
@@ -44,6 +46,12 @@ class Project(Base):
 
 class Clip(Base):
     __tablename__ = "clips"
+    __table_args__ = (
+        # clip listings: per project, by score then id (see clip_page)
+        Index("ix_clips_project_score_id", "project_id", "score", "id"),
+        # approved clips of a project (render_batch, assemble_longform)
+        Index("ix_clips_project_approved", "project_id", "approved"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, index=True)
     clip_id = Column(String, unique=True, index=True)
@@ -53,11 +61,18 @@ class Clip(Base):
     score = Column(Float, default=0.0)
     emotion = Column(String)
     # older migrations created the column named 'metadata'; keep attribute name
-    # `metadata_json` for clarity but map it to the existing DB column 'metadata'
+    # `metadata_json` for clarity but map it to the existing DB column 'metadata'.
+    # Holds free-form extras only; the fields in CLIP_FIELDS have own columns.
     metadata_json = Column("metadata", Text)
+    text = Column(Text, nullable=True)
+    source_path = Column(String, nullable=True, index=True)
+    audio_energy = Column(Float, nullable=True)
+    speech_markers = Column(Integer, nullable=True)
     approved = Column(String, default="pending")  # pending/approved/rejected
     renderer_status = Column(String, default="not_rendered")
     output_path = Column(String, nullable=True)
+    # low-resolution review render, see ffmpeg_renderer.render_proxy
+    proxy_path = Column(String, nullable=True)
     thumbnail_path = Column(String, nullable=True)
     title_suggestions = Column(Text, nullable=True)
     script = Column(Text, nullable=True)
@@ -96,6 +111,10 @@ class Subscription(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    # per-user counts of one event type since a time (quota, analytics)
+    __table_args__ = (
+        Index("ix_events_user_type_created", "user_id", "event_type", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True, nullable=True)
     clip_id = Column(String, index=True, nullable=True)
@@ -104,6 +123,28 @@ class Event(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 
+class UserEventRollup(Base):
+    """Per-user, per-day totals of one event type, kept by record_event."""
+
+    __tablename__ = "event_rollups_user_daily"
+    user_id = Column(Integer, primary_key=True)
+    event_type = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+
+
+class ClipEventRollup(Base):
+    """Per-clip, per-day totals of one event type, kept by record_event."""
+
+    __tablename__ = "event_rollups_clip_daily"
+    clip_id = Column(String, primary_key=True)
+    event_type = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
 
@@ -166,20 +207,132 @@ def create_user(session, email, name=None, tier="free", api_key=None):
     return u
 
 
+def _add_to_rollup(session, model, key, value):
+    # count += 1, value_sum += value for one rollup row, creating it if needed
+    row = dict(key, count=1, value_sum=value or 0.0)
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        table = model.__table__
+        stmt = insert(table).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key],
+            set_={
+                "count": table.c.count + 1,
+                "value_sum": table.c.value_sum + stmt.excluded.value_sum,
+            },
+        )
+        session.execute(stmt)
+        return
+    existing = session.get(model, tuple(key.values()), with_for_update=True)
+    if existing is None:
+        session.add(model(**row))
+    else:
+        existing.count += 1
+        existing.value_sum += row["value_sum"]
+
+
 def record_event(session, user_id=None, clip_id=None, event_type="generic", value=None):
     e = Event(
         user_id=user_id,
         clip_id=clip_id,
         event_type=event_type,
         value=value,
+        created_at=datetime.datetime.utcnow(),
     )
     session.add(e)
+    # rollups change in the same transaction as the event they count
+    day = e.created_at.date()
+    if user_id is not None:
+        key = {"user_id": user_id, "event_type": event_type, "day": day}
+        _add_to_rollup(session, UserEventRollup, key, value)
+    if clip_id is not None:
+        key = {"clip_id": clip_id, "event_type": event_type, "day": day}
+        _add_to_rollup(session, ClipEventRollup, key, value)
     session.commit()
+    if event_type == "clip_created" and user_id is not None:
+        # quota imports this module; keep the import out of module load
+        import quota
+
+        quota.record_clip_created(user_id)
     return e
 
 
+def backfill_event_rollups(session=None):
+    """Rebuild both rollup tables from the events table.
+
+    For existing events (run once after migrating) or to repair drift; runs
+    as one transaction, so pause event ingestion while it runs.
+    Usable as an RQ job: opens its own session when none is given.
+    """
+    from sqlalchemy import func, insert, select
+
+    own = session is None
+    session = SessionLocal() if own else session
+    try:
+        day = func.date(Event.created_at)
+        for model, key in (
+            (UserEventRollup, Event.user_id),
+            (ClipEventRollup, Event.clip_id),
+        ):
+            session.query(model).delete()
+            totals = (
+                select(
+                    key,
+                    Event.event_type,
+                    day,
+                    func.count(Event.id),
+                    func.coalesce(func.sum(Event.value), 0.0),
+                )
+                .where(key.is_not(None))
+                .group_by(key, Event.event_type, day)
+            )
+            cols = [key.key, "event_type", "day", "count", "value_sum"]
+            session.execute(insert(model.__table__).from_select(cols, totals))
+        session.commit()
+        return {
+            "user_rows": session.query(UserEventRollup).count(),
+            "clip_rows": session.query(ClipEventRollup).count(),
+        }
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if own:
+            session.close()
+
+
+def _rollup_totals(session, user_id, event_type):
+    from sqlalchemy import func
+
+    return (
+        session.query(
+            func.sum(UserEventRollup.count), func.sum(UserEventRollup.value_sum)
+        )
+        .filter(
+            UserEventRollup.user_id == user_id,
+            UserEventRollup.event_type == event_type,
+        )
+        .one()
+    )
+
+
 def get_user_analytics(session, user_id):
-    # simple aggregation: counts and sum of watch_time
+    """Clips created and watch time of a user, read from the daily rollups
+    (one row per active day, however many events)."""
+    total_clips, _ = _rollup_totals(session, user_id, "clip_created")
+    _, watch_time = _rollup_totals(session, user_id, "watch_time")
+    return {
+        "clips_created": int(total_clips or 0),
+        "watch_time_seconds": float(watch_time or 0),
+    }
+
+
+def get_user_analytics_raw(session, user_id):
+    """`get_user_analytics` aggregated over the raw events (for checks)."""
     from sqlalchemy import func
 
     total_clips = (
@@ -199,10 +352,23 @@ def get_user_analytics(session, user_id):
     }
 
 
+# metadata keys stored in typed Clip columns instead of the JSON blob
+CLIP_FIELDS = ("text", "source_path", "audio_energy", "speech_markers")
+
+
+def split_metadata(metadata):
+    """(typed column values, JSON text of the remaining keys) for a clip's
+    metadata dict."""
+    extra = dict(metadata or {})
+    fields = {name: extra.pop(name, None) for name in CLIP_FIELDS}
+    return fields, json.dumps(extra)
+
+
 def create_clip(
     session, project_id, clip_id, start, end, score, emotion, metadata=None
 ):
     duration = end - start
+    fields, extra = split_metadata(metadata)
     c = session.query(Clip).filter_by(clip_id=clip_id).first()
     if not c:
         c = Clip(
@@ -213,9 +379,10 @@ def create_clip(
             duration=duration,
             score=score,
             emotion=emotion,
-            metadata_json=json.dumps(metadata or {}),
+            metadata_json=extra,
             approved="pending",
             renderer_status="not_rendered",
+            **fields,
         )
         session.add(c)
     else:
@@ -224,11 +391,113 @@ def create_clip(
         c.duration = duration
         c.score = score
         c.emotion = emotion
-        c.metadata_json = json.dumps(metadata or {})
+        c.metadata_json = extra
+        for name, value in fields.items():
+            setattr(c, name, value)
     session.commit()
     return c
 
 
+# rows per INSERT ... ON CONFLICT statement in bulk_upsert_clips
+BULK_BATCH_SIZE = 500
+# columns an upsert replaces; review and render state are left alone
+_CLIP_UPSERT_COLUMNS = (
+    "start",
+    "end",
+    "duration",
+    "score",
+    "emotion",
+    "metadata",
+) + CLIP_FIELDS
+
+
+def _clip_row(project_id, record):
+    start = record["start"]
+    end = record["end"]
+    fields, extra = split_metadata(record.get("metadata"))
+    return {
+        **fields,
+        "project_id": project_id,
+        "clip_id": record["clip_id"],
+        "start": start,
+        "end": end,
+        "duration": end - start,
+        "score": record.get("score", 0.0),
+        "emotion": record.get("emotion"),
+        "metadata": extra,
+        "approved": "pending",
+        "renderer_status": "not_rendered",
+    }
+
+
+def bulk_upsert_clips(session, project_id, records, batch_size=BULK_BATCH_SIZE):
+    """Insert or update many clips in a single transaction.
+
+    records: dicts with clip_id, start, end, score, emotion and optional
+    metadata. Existing clips (matched by clip_id) get the same fields
+    replaced as in `create_clip`. SQLite and Postgres use batched
+    INSERT ... ON CONFLICT statements; other dialects merge row by row,
+    still in one transaction. Returns the number of records written.
+    """
+    rows = [_clip_row(project_id, r) for r in records]
+    if not rows:
+        return 0
+    dialect = session.get_bind().dialect.name
+    table = Clip.__table__
+    try:
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.clip_id],
+                set_={name: stmt.excluded[name] for name in _CLIP_UPSERT_COLUMNS},
+            )
+            for i in range(0, len(rows), batch_size):
+                session.execute(stmt, rows[i : i + batch_size])
+        else:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i : i + batch_size]
+                existing = {
+                    c.clip_id: c
+                    for c in session.query(Clip).filter(
+                        Clip.clip_id.in_([r["clip_id"] for r in batch])
+                    )
+                }
+                for r in batch:
+                    c = existing.get(r["clip_id"])
+                    if c is None:
+                        session.execute(table.insert(), r)
+                        continue
+                    c.start, c.end, c.duration = r["start"], r["end"], r["duration"]
+                    c.score, c.emotion = r["score"], r["emotion"]
+                    c.metadata_json = r["metadata"]
+                    for name in CLIP_FIELDS:
+                        setattr(c, name, r[name])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return len(rows)
+
+
+def bulk_update_clip_scores(session, ids, scores, batch_size=5000):
+    """Set Clip.score by primary key for many rows in one transaction."""
+    from sqlalchemy import update
+
+    rows = [{"id": int(i), "score": float(v)} for i, v in zip(ids, scores)]
+    try:
+        for i in range(0, len(rows), batch_size):
+            session.execute(update(Clip), rows[i : i + batch_size])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return len(rows)
+
+
 def get_clips_for_project(session, project_id, limit=100):
     return (
         session.query(Clip)
@@ -237,3 +506,92 @@ def get_clips_for_project(session, project_id, limit=100):
         .limit(limit)
         .all()
     )
+
+
+MAX_PAGE_SIZE = 500
+# what a clip listing row needs; metadata_json and the text columns are left out
+CLIP_LIST_COLUMNS = (
+    Clip.id,
+    Clip.clip_id,
+    Clip.start,
+    Clip.end,
+    Clip.duration,
+    Clip.score,
+    Clip.emotion,
+    Clip.approved,
+    Clip.proxy_path,
+)
+
+
+def encode_cursor(score, clip_pk):
+    """Opaque cursor for the position after the row (score, clip_pk).
+
+    score may be None (an unscored clip).
+    """
+    raw = json.dumps([score, clip_pk]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(score, id) from `encode_cursor`; ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, clip_pk = json.loads(raw)
+        return (None if score is None else float(score)), int(clip_pk)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def clip_page(
+    session,
+    project_id,
+    columns=CLIP_LIST_COLUMNS,
+    limit=100,
+    cursor=None,
+    approved=None,
+    emotion=None,
+    min_score=None,
+    max_score=None,
+):
+    """One page of a project's clips, best score first, and the next cursor.
+
+    Keyset pagination on (score, id): each page seeks past the last row of
+    the previous one through ix_clips_project_score_id, so page N costs the
+    same as page 1. Clips without a score come after all scored ones, by
+    id descending (a row comparison with NULL never matches, so they are
+    paged separately). Only `columns` are selected; rows are named tuples.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    columns = list(columns)
+    for needed in (Clip.score, Clip.id):
+        if not any(c is needed for c in columns):
+            columns.append(needed)
+    q = session.query(*columns).filter(Clip.project_id == project_id)
+    if approved is not None:
+        q = q.filter(Clip.approved == approved)
+    if emotion is not None:
+        q = q.filter(Clip.emotion == emotion)
+    if min_score is not None:
+        q = q.filter(Clip.score >= min_score)
+    if max_score is not None:
+        q = q.filter(Clip.score <= max_score)
+    after = decode_cursor(cursor) if cursor else None
+    rows = []
+    if after is None or after[0] is not None:
+        scored = q.filter(Clip.score.is_not(None))
+        if after is not None:
+            scored = scored.filter(tuple_(Clip.score, Clip.id) < tuple_(*after))
+        order = (Clip.score.desc(), Clip.id.desc())
+        rows = scored.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit and min_score is None and max_score is None:
+        unscored = q.filter(Clip.score.is_(None))
+        if after is not None and after[0] is None:
+            unscored = unscored.filter(Clip.id < after[1])
+        rest = limit + 1 - len(rows)
+        rows += unscored.order_by(Clip.id.desc()).limit(rest).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+    return rows, next_cursor
@@ -1,16 +1,22 @@
 """Simple heuristic emotion classifier for audio segments.
 
-Tries to use librosa and numpy to compute basic features; falls back to
-rule-based heuristics if librosa isn't available.
+Labels come from fixed rules over RMS energy and zero-crossing rate, so the
+same audio always gets the same label. `classify_batch` applies the rules to
+feature arrays for many segments at once; `classify` computes the features
+of one slice with librosa, or with numpy if librosa isn't available.
 """
 
-import random
+import numpy as np
+
+# label for segments without usable features
+UNKNOWN = "unknown"
 
 
 def classify_from_features(rms=None, zcr=None, tempo=None):
-    # Simple rules mapping energy/zcr/tempo to emotions
+    # Simple rules mapping energy/zcr to emotions; tempo is accepted for
+    # callers that have it but no rule uses it
     if rms is None:
-        return random.choice(["funny", "intense", "cringe", "emotional"])
+        return UNKNOWN
     if rms > 0.08 and (zcr is not None and zcr > 0.12):
         return "intense"
     if rms > 0.06 and (zcr is not None and zcr < 0.08):
@@ -20,14 +26,53 @@ def classify_from_features(rms=None, zcr=None, tempo=None):
     return "cringe"
 
 
+def classify_batch(rms, zcr=None, tempo=None):
+    """Labels for many segments in one call, same rules as
+    `classify_from_features`.
+
+    rms, zcr: per-segment mean features. With zcr None, `rms` may be an
+    (n, 2+) matrix whose first two columns are rms and zcr. Rows with a NaN
+    rms are labelled "unknown"; a NaN zcr only fails the zcr conditions, as
+    a missing zcr does for `classify_from_features`.
+    """
+    rms = np.asarray(rms, dtype=float)
+    if zcr is None and rms.ndim == 2:
+        rms, zcr = rms[:, 0], rms[:, 1]
+    zcr = np.full(rms.shape, np.nan) if zcr is None else np.asarray(zcr, dtype=float)
+    # comparisons with NaN are False, which is what the rules need
+    with np.errstate(invalid="ignore"):
+        labels = np.select(
+            [
+                np.isnan(rms),
+                (rms > 0.08) & (zcr > 0.12),
+                (rms > 0.06) & (zcr < 0.08),
+                rms < 0.02,
+            ],
+            [UNKNOWN, "intense", "funny", "emotional"],
+            default="cringe",
+        )
+    return labels.astype(object)
+
+
+def _numpy_features(audio, frame_length, hop_length):
+    # librosa-free mean RMS and zero-crossing rate over whole frames
+    audio = np.asarray(audio, dtype=np.float64).ravel()
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_length)[::hop_length]
+    rms = float(np.sqrt(np.mean(frames**2, axis=1)).mean())
+    signs = np.signbit(frames)
+    zcr = float(np.mean(signs[:, 1:] != signs[:, :-1]))
+    return rms, zcr
+
+
 def classify(audio, sr):
+    frame_length = 2048
+    hop_length = 512
     try:
-        import numpy as np
         import librosa
 
         # compute RMS and zero-crossing rate
-        frame_length = 2048
-        hop_length = 512
         rms = float(
             np.mean(
                 librosa.feature.rms(
@@ -42,14 +87,11 @@ def classify(audio, sr):
                 )
             )
         )
-        onset_env = librosa.onset.onset_strength(y=audio, sr=sr)
-        tempo_vals = librosa.beat.tempo(onset_envelope=onset_env, sr=sr)
-        tempo = (
-            float(tempo_vals.mean())
-            if (onset_env is not None and hasattr(tempo_vals, "mean"))
-            else 0.0
-        )
-        return classify_from_features(rms=rms, zcr=zcr, tempo=tempo)
     except Exception:
-        # If librosa not installed or fails, return heuristic/random
-        return classify_from_features(rms=None)
+        try:
+            rms, zcr = _numpy_features(audio, frame_length, hop_length)
+        except Exception:
+            return UNKNOWN
+    if not np.isfinite(rms):
+        return UNKNOWN
+    return classify_from_features(rms=rms, zcr=zcr)
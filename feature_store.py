@@ -0,0 +1,173 @@
+"""Persistent store of whole-track audio features, keyed by content hash.
+
+Re-analysing a source (new thresholds, new emotion rules) should not mean
+decoding it again. After the first analysis the frame-level arrays of a
+source (RMS, ZCR, onset envelope when computed, silent intervals) are saved
+as .npy files next to a small meta.json and later opened with mmap.
+
+Entries live in `CLIPFORGE_FEATURE_STORE_DIR/<sha256 of the file contents>/`.
+A changed source hashes differently, and an entry whose meta does not match
+the current FEATURE_VERSION or analysis settings is recomputed. Hashes are
+remembered per (path, size, mtime) so unchanged files are not re-read.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+import audio_features
+
+STORE_DIR = os.environ.get(
+    "CLIPFORGE_FEATURE_STORE_DIR",
+    os.path.join(os.path.dirname(__file__), "outputs", "features"),
+)
+# bump whenever the stored arrays would come out differently
+FEATURE_VERSION = 1
+_ARRAYS = ("rms", "zcr", "onset", "silences")
+
+_hash_cache = {}
+_lock = threading.Lock()
+
+
+def _settings():
+    return {
+        "version": FEATURE_VERSION,
+        "sr": audio_features.ANALYSIS_SR,
+        "frame_length": audio_features.FRAME_LENGTH,
+        "hop_length": audio_features.HOP_LENGTH,
+    }
+
+
+def _identity(path):
+    st = os.stat(path)
+    return (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+
+def _hash_index_path():
+    return os.path.join(STORE_DIR, "hashes.json")
+
+
+def _load_hash_index():
+    try:
+        with open(_hash_index_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_hash(identity, digest):
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        index = _load_hash_index()
+        index[json.dumps(identity)] = digest
+        tmp = f"{_hash_index_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, _hash_index_path())
+    except Exception:
+        pass
+
+
+def content_hash(path):
+    """sha256 of the file contents, computed once per file version."""
+    identity = _identity(path)
+    with _lock:
+        if identity in _hash_cache:
+            return _hash_cache[identity]
+    digest = _load_hash_index().get(json.dumps(identity))
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _save_hash(identity, digest)
+    with _lock:
+        _hash_cache[identity] = digest
+    return digest
+
+
+def _entry_dir(digest):
+    return os.path.join(STORE_DIR, digest[:2], digest)
+
+
+def load(path):
+    """Stored features of `path` (arrays memory-mapped), or None when missing
+    or stale."""
+    entry = _entry_dir(content_hash(path))
+    try:
+        with open(os.path.join(entry, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+    if meta.get("settings") != _settings():
+        return None
+    arrays = {}
+    try:
+        for name in _ARRAYS:
+            file = os.path.join(entry, f"{name}.npy")
+            arrays[name] = (
+                np.load(file, mmap_mode="r") if name in meta["arrays"] else None
+            )
+    except (OSError, ValueError):
+        return None
+    return audio_features.TrackFeatures(
+        sr=meta["sr"],
+        hop_length=meta["hop_length"],
+        n_samples=meta["n_samples"],
+        **arrays,
+    )
+
+
+def save(path, track):
+    """Store `track` for `path`; replaces a stale entry."""
+    digest = content_hash(path)
+    entry = _entry_dir(digest)
+    parent = os.path.dirname(entry)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{digest}.", dir=parent)
+    try:
+        stored = []
+        for name in _ARRAYS:
+            arr = getattr(track, name)
+            if arr is None:
+                continue
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr))
+            stored.append(name)
+        meta = {
+            "settings": _settings(),
+            "sr": track.sr,
+            "hop_length": track.hop_length,
+            "n_samples": track.n_samples,
+            "arrays": stored,
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # readers only ever see complete entries: swap the directory in
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # a concurrent writer got there first; its entry is as good
+            pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def get_track_features(path):
+    """Features of `path` from the store, decoding and storing them on a miss."""
+    track = load(path)
+    if track is not None:
+        return track
+    track = audio_features.load_track_features(path)
+    track = track._replace(silences=audio_features.silent_intervals(track))
+    try:
+        save(path, track)
+    except OSError:
+        pass
+    return track
@@ -0,0 +1,154 @@
+"""Run ffmpeg with machine-readable progress and real failure reporting.
+
+`run_ffmpeg` adds `-progress pipe:1` to a command, parses the key=value blocks
+ffmpeg writes there and turns them into snapshots with percent, fps, speed
+factor and ETA. Snapshots are pushed into the current RQ job's meta (when the
+code runs inside an RQ worker) so `GET /jobs/{job_id}` can show them.
+A non-zero exit raises `FFmpegError` with the tail of ffmpeg's stderr.
+"""
+
+import subprocess
+import threading
+import time
+from collections import deque
+
+# minimum seconds between job meta writes per render
+META_INTERVAL = 1.0
+STDERR_TAIL_LINES = 20
+
+
+class FFmpegError(RuntimeError):
+    def __init__(self, returncode, stderr_tail=""):
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail
+        last = " | ".join(stderr_tail.splitlines()[-3:])
+        super().__init__(f"ffmpeg exited with code {returncode}: {last}")
+
+
+_meta_lock = threading.Lock()
+
+
+def report_to_current_job(label, snapshot):
+    """Store a progress snapshot under job.meta["renders"][label], if in RQ."""
+    try:
+        from rq import get_current_job
+
+        job = get_current_job()
+    except Exception:
+        return
+    if job is None:
+        return
+    with _meta_lock:
+        try:
+            job.meta.setdefault("renders", {})[label] = snapshot
+            job.save_meta()
+        except Exception:
+            pass
+
+
+def _parse_time_us(block):
+    # out_time_ms is also in microseconds (long-standing ffmpeg quirk)
+    for key in ("out_time_us", "out_time_ms"):
+        try:
+            return int(block[key])
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+def _snapshot(block, duration, started):
+    elapsed = time.monotonic() - started
+    out_us = _parse_time_us(block)
+    media = out_us / 1e6 if out_us is not None and out_us >= 0 else None
+    try:
+        fps = float(block.get("fps", ""))
+    except ValueError:
+        fps = None
+    try:
+        speed = float(block.get("speed", "").rstrip("x"))
+    except ValueError:
+        speed = None
+    if speed is None and media and elapsed > 0:
+        speed = media / elapsed
+    percent = eta = None
+    if duration and media is not None:
+        percent = round(min(100.0, 100.0 * media / duration), 1)
+        if speed:
+            eta = round(max(0.0, duration - media) / speed, 1)
+    return {
+        "state": "running" if block.get("progress") != "end" else "done",
+        "percent": percent,
+        "out_seconds": round(media, 3) if media is not None else None,
+        "fps": fps,
+        "speed": speed,
+        "eta_seconds": eta,
+        "elapsed_seconds": round(elapsed, 2),
+    }
+
+
+def run_ffmpeg(cmd, duration=None, label="ffmpeg", on_progress=None):
+    """Run an ffmpeg command list, reporting progress; returns the final stats.
+
+    duration: expected output length in seconds, enables percent and ETA.
+    on_progress: callable(label, snapshot); defaults to the RQ job meta.
+    """
+    on_progress = on_progress or report_to_current_job
+    full = [cmd[0], "-hide_banner", "-nostats", "-progress", "pipe:1", *cmd[1:]]
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        full,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    def _drain_stderr():
+        for line in proc.stderr:
+            tail.append(line.rstrip())
+
+    reader = threading.Thread(target=_drain_stderr, daemon=True)
+    reader.start()
+
+    block = {}
+    last = None
+    last_sent = 0.0
+    try:
+        for line in proc.stdout:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            block[key] = value
+            if key != "progress":
+                continue
+            last = _snapshot(block, duration, started)
+            now = time.monotonic()
+            if value == "end" or now - last_sent >= META_INTERVAL:
+                on_progress(label, last)
+                last_sent = now
+            block = {}
+        returncode = proc.wait()
+    finally:
+        # e.g. RQ's job timeout or a raising on_progress: don't leave ffmpeg
+        # running and writing the partial output
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    reader.join(timeout=5)
+    wall = time.monotonic() - started
+    stats = dict(last or {}, wall_seconds=round(wall, 3), returncode=returncode)
+    if duration and wall > 0:
+        # realised media seconds per wall second, for capacity planning
+        stats["speed"] = round(duration / wall, 3)
+    if returncode != 0:
+        stats["state"] = "failed"
+        on_progress(label, stats)
+        raise FFmpegError(returncode, "\n".join(tail))
+    stats["state"] = "done"
+    if duration:
+        stats["percent"] = 100.0
+        stats["eta_seconds"] = 0.0
+    on_progress(label, stats)
+    return stats
@@ -1,66 +1,316 @@
-import subprocess
 import os
 import shutil
+from contextlib import ExitStack
 from typing import List
+import render_cache
+from render_locks import artifact_lock
+from ffmpeg_progress import FFmpegError, run_ffmpeg
+import smart_cut
+from seek_planner import (
+    SeekPlan,
+    get_keyframes,
+    has_audio,
+    keyframe_before,
+    plan_seek,
+    rate_filter,
+    trim_filters,
+)
 
 # Detect ffmpeg availability once
 HAVE_FFMPEG = shutil.which("ffmpeg") is not None
 
 
-def render_short(input_path, start, end, srt_path, output_path):
-    # Use safe quoting for subtitle path and apply common short settings
-    vf = "crop=ih*9/16:ih,scale=1080:1920"
+SHORT_VF = "crop=ih*9/16:ih,scale=1080:1920"
+SHORT_SUBTITLE_STYLE = "Fontsize=46"
+SHORT_AF = "loudnorm"
+SHORT_ENCODER_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "20"]
+
+# Review proxies: same framing at ~360p, no subtitles and no loudnorm, encoded
+# as cheaply as possible. They are only watched in the dashboard.
+PROXY_VF = "crop=ih*9/16:ih,scale=360:640"
+PROXY_ENCODER_ARGS = [
+    "-c:v",
+    "libx264",
+    "-preset",
+    "ultrafast",
+    "-crf",
+    "28",
+    "-c:a",
+    "aac",
+    "-b:a",
+    "96k",
+    "-movflags",
+    "+faststart",
+]
+
+# Upper bound on clips written from a single decode; each output keeps its own
+# encoder alive, so very wide split graphs are chunked.
+MAX_OUTPUTS_PER_DECODE = int(os.environ.get("CLIPFORGE_MAX_OUTPUTS_PER_DECODE", "8"))
+# A shared decode runs from the first clip to the last one; past this many
+# seconds between clips a fresh seek is cheaper than decoding the gap.
+MAX_DECODE_GAP = float(os.environ.get("CLIPFORGE_MAX_DECODE_GAP", "20"))
+
+
+def _subtitles_filter(srt_path):
     # subtitles filter needs proper escaping if path contains spaces
-    subtitles_filter = "subtitles='" + srt_path + "':force_style='Fontsize=46'"
+    return "subtitles='" + srt_path + f"':force_style='{SHORT_SUBTITLE_STYLE}'"
+
+
+def short_signature():
+    """Everything besides source, range and subtitle text that shapes a short."""
+    return {
+        "vf": SHORT_VF,
+        "subtitle_style": SHORT_SUBTITLE_STYLE,
+        "af": SHORT_AF,
+        "encoder": SHORT_ENCODER_ARGS,
+    }
+
+
+def proxy_signature():
+    return {"vf": PROXY_VF, "encoder": PROXY_ENCODER_ARGS, "proxy": True}
+
+
+def _short_chains(vtrim, atrim, srt_path, fps, proxy=False):
+    """Video and audio filter chains for one short (or its review proxy)."""
+    if proxy:
+        return f"{vtrim},{PROXY_VF},setpts=PTS-STARTPTS{fps}", atrim
+    video = f"{vtrim},{SHORT_VF},{_subtitles_filter(srt_path)},setpts=PTS-STARTPTS{fps}"
+    return video, f"{atrim},{SHORT_AF}"
+
+
+def _thread_args(threads):
+    if not threads:
+        return []
+    return ["-threads", str(int(threads)), "-filter_threads", str(int(threads))]
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def render_short(
+    input_path, start, end, srt_path, output_path, threads=None, proxy=False
+):
+    """Render one 9:16 short. Returns True when ffmpeg produced the output.
+
+    threads: encoder/filter thread count; None lets ffmpeg use every core.
+    proxy: render the low-resolution review proxy instead (srt_path unused).
+
+    ffmpeg writes to a temporary sibling that is renamed into place only on a
+    clean exit, so a crashed render never leaves a half-written output.
+    Raises FFmpegError when ffmpeg exits non-zero.
+    """
+    # seek the input to the keyframe before the clip and trim the rest exactly,
+    # so only the clip itself is decoded
+    plan = plan_seek(input_path, start, end)
+    vtrim, atrim = trim_filters(plan)
+    vchain, achain = _short_chains(
+        vtrim, atrim, srt_path, rate_filter(input_path), proxy=proxy
+    )
+    tmp_out = render_cache.partial_path(output_path)
     cmd = [
         "ffmpeg",
         "-y",
+        "-ss",
+        str(plan.seek),
         "-i",
         input_path,
-        "-ss",
-        str(start),
-        "-to",
-        str(end),
         "-vf",
-        f"{vf},{subtitles_filter}",
+        vchain,
         "-af",
-        "loudnorm",
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
-        "-crf",
-        "20",
-        output_path,
+        achain,
+        *(PROXY_ENCODER_ARGS if proxy else SHORT_ENCODER_ARGS),
+        *_thread_args(threads),
+        tmp_out,
     ]
     if not HAVE_FFMPEG:
         # ffmpeg not available on host; skip actual render
-        return
+        return False
     try:
-        subprocess.run(cmd, check=False)
+        run_ffmpeg(cmd, duration=plan.duration, label=os.path.basename(output_path))
     except Exception:
-        return
+        _discard(tmp_out)
+        raise
+    os.replace(tmp_out, output_path)
+    return True
 
 
-def render_short_cached(input_path, start, end, srt_path, output_path):
-    """Higher-level wrapper that skips rendering if output exists and is fresher than source."""
-    if os.path.exists(output_path):
+def render_proxy(input_path, start, end, output_path, threads=None):
+    """Render the low-resolution review proxy of one clip."""
+    return render_short(
+        input_path, start, end, None, output_path, threads=threads, proxy=True
+    )
+
+
+def _build_multi_short_cmd(input_path, clips, proxy=False):
+    """Build one ffmpeg command that decodes `input_path` once and writes every clip.
+
+    The decoded streams are split per clip and each branch is trimmed to its
+    range before the usual 9:16 crop, subtitles and loudnorm. Subtitles are
+    burned before the timestamps are reset so absolute SRT times still match.
+    Decoding starts at the keyframe before the earliest clip in the chunk
+    (at the clip itself when there is no keyframe index, like `plan_seek`).
+    With `proxy` every branch gets the review proxy chain instead.
+    """
+    n = len(clips)
+    first_start = min(float(c["start"]) for c in clips)
+    last_end = max(float(c["end"]) for c in clips)
+    keyframes = get_keyframes(input_path)
+    seek = keyframe_before(keyframes, first_start) if keyframes else first_start
+    fps = rate_filter(input_path)
+    graph = [
+        "[0:v]split=%d%s" % (n, "".join(f"[v{i}]" for i in range(n))),
+        "[0:a]asplit=%d%s" % (n, "".join(f"[a{i}]" for i in range(n))),
+    ]
+    for i, c in enumerate(clips):
+        start, end = float(c["start"]), float(c["end"])
+        vtrim, atrim = trim_filters(SeekPlan(seek, start - seek, end - start))
+        vchain, achain = _short_chains(
+            vtrim, atrim, c.get("srt_path"), fps, proxy=proxy
+        )
+        graph.append(f"[v{i}]{vchain}[vo{i}]")
+        graph.append(f"[a{i}]{achain}[ao{i}]")
+    # decode only from the keyframe before the first clip to the end of the last
+    cmd = ["ffmpeg", "-y", "-ss", str(seek), "-t", str(last_end - seek)]
+    cmd += ["-i", input_path]
+    cmd += ["-filter_complex", ";".join(graph)]
+    encoder_args = PROXY_ENCODER_ARGS if proxy else SHORT_ENCODER_ARGS
+    for i, c in enumerate(clips):
+        cmd += ["-map", f"[vo{i}]", "-map", f"[ao{i}]", *encoder_args, c["tmp_path"]]
+    return cmd
+
+
+def render_shorts_from_source(input_path, clips, max_outputs=None, proxy=False):
+    """Render several shorts cut from the same source with a single decode per chunk.
+
+    clips: list of dicts with keys start, end, srt_path, output_path
+    (srt_path is not needed with `proxy`). Clips are grouped by
+    `decode_groups`, so far-apart clips get separate decodes.
+    Clips already in the render cache are materialized without decoding.
+    Returns one result dict per clip, in the order given; clips whose render
+    failed carry an "error" message.
+    """
+    max_outputs = max(1, max_outputs or MAX_OUTPUTS_PER_DECODE)
+    results = [
+        {"output": c.get("output_path"), "skipped": False, "single_decode": False}
+        for c in clips
+    ]
+    if not HAVE_FFMPEG:
+        # keep the same behaviour as render_short: nothing to do without ffmpeg
+        return results
+
+    signature = proxy_signature() if proxy else short_signature()
+    keys = {}
+    pending = []
+    for i, c in enumerate(clips):
+        key = render_cache.render_key(
+            input_path, c["start"], c["end"], c.get("srt_path"), signature
+        )
+        if render_cache.fetch(key, c["output_path"]):
+            results[i]["skipped"] = True
+            continue
+        keys[i] = key
+        pending.append(i)
+
+    with ExitStack() as locks:
+        # one worker per artifact; sorted so concurrent batches can't deadlock
+        for key in sorted({keys[i] or clips[i]["output_path"] for i in pending}):
+            locks.enter_context(artifact_lock(key))
+        # another worker may have finished some of these while we waited
+        for i in list(pending):
+            if keys[i] and render_cache.fetch(keys[i], clips[i]["output_path"]):
+                results[i]["skipped"] = True
+                pending.remove(i)
+        _render_pending(input_path, clips, pending, keys, results, max_outputs, proxy)
+    return results
+
+
+def decode_groups(clips, max_outputs=None, max_gap=None):
+    """Split clips into the groups that are each rendered from one decode.
+
+    clips: dicts with start and end. Returns lists of indices into `clips`,
+    in timeline order. A group holds at most `max_outputs` clips and ends
+    where the next clip starts more than `max_gap` seconds after it.
+    """
+    max_outputs = max(1, max_outputs or MAX_OUTPUTS_PER_DECODE)
+    max_gap = MAX_DECODE_GAP if max_gap is None else max_gap
+    groups = []
+    end = None
+    for i in sorted(range(len(clips)), key=lambda i: float(clips[i]["start"])):
+        start = float(clips[i]["start"])
+        if not groups or len(groups[-1]) >= max_outputs or start - end > max_gap:
+            groups.append([])
+            end = start
+        groups[-1].append(i)
+        end = max(end, float(clips[i]["end"]))
+    return groups
+
+
+def _render_pending(input_path, clips, pending, keys, results, max_outputs, proxy):
+    groups = decode_groups([clips[i] for i in pending], max_outputs)
+    for n, group in enumerate(groups):
+        chunk = [pending[j] for j in group]
+        outs = [
+            dict(clips[i], tmp_path=render_cache.partial_path(clips[i]["output_path"]))
+            for i in chunk
+        ]
+        cmd = _build_multi_short_cmd(input_path, outs, proxy=proxy)
+        label = f"{os.path.basename(input_path)}#{n}"
         try:
-            if os.path.exists(input_path) and os.path.getmtime(
-                output_path
-            ) >= os.path.getmtime(input_path):
-                return {"output": output_path, "skipped": True}
-        except Exception:
-            pass
-    render_short(input_path, start, end, srt_path, output_path)
+            run_ffmpeg(cmd, label=label)
+            ok = True
+        except (FFmpegError, OSError):
+            ok = False
+        for i, c in zip(chunk, outs):
+            if ok:
+                os.replace(c["tmp_path"], c["output_path"])
+                render_cache.store(keys[i], c["output_path"])
+                results[i]["single_decode"] = True
+                continue
+            _discard(c["tmp_path"])
+            # e.g. a source without an audio stream: fall back to one decode per clip
+            try:
+                render_short(
+                    input_path,
+                    c["start"],
+                    c["end"],
+                    c.get("srt_path"),
+                    c["output_path"],
+                    proxy=proxy,
+                )
+                render_cache.store(keys[i], c["output_path"])
+            except (FFmpegError, OSError) as e:
+                results[i]["error"] = str(e)
+
+
+def render_short_cached(input_path, start, end, srt_path, output_path, threads=None):
+    """Render through the content-addressed render cache.
+
+    The cache key covers the source identity, time range, subtitle text and
+    filter/encoder settings, so any change to those re-renders. Renders of
+    the same key are serialized across workers (see `render_locks`).
+    """
+    key = render_cache.render_key(input_path, start, end, srt_path, short_signature())
+    if render_cache.fetch(key, output_path):
+        return {"output": output_path, "skipped": True}
+    with artifact_lock(key or output_path):
+        if render_cache.fetch(key, output_path):
+            return {"output": output_path, "skipped": True}
+        if render_short(input_path, start, end, srt_path, output_path, threads=threads):
+            render_cache.store(key, output_path)
     return {"output": output_path, "skipped": False}
 
 
-def render_clips_parallel(tasks: List[dict], workers: int = 4):
+def render_clips_parallel(tasks: List[dict], workers: int = None):
     """
     Render a list of clip tasks in parallel.
 
     Each task should contain keys: input_path, start, end, srt_path, output_path.
+    By default concurrency and per-job threads are sized by `render_scheduler`;
+    pass `workers` to use a fixed-size pool instead.
     """
     try:
         from ffmpeg_worker import render_batch_parallel
@@ -93,86 +343,161 @@ def render_clips_parallel(tasks: List[dict], workers: int = 4):
         return res
 
 
-def render_longform(clips_list_file, music_file, output_path):
-    # Concatenate clips
-    # Build concatenated output using concat demuxer
-    temp_out = "temp_long.mp4"
-    concat_cmd = [
-        "ffmpeg",
-        "-y",
-        "-f",
-        "concat",
-        "-safe",
-        "0",
-        "-i",
-        clips_list_file,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "medium",
-        "-crf",
-        "20",
-        temp_out,
-    ]
+def _ducking_filter(voice, music, out):
+    """Music bed under speech: the voice drives a sidechain compressor on the
+    music, then both are mixed back together."""
+    return (
+        f"[{music}]volume=0.12[music];"
+        f"[{voice}]asplit=2[voice][key];"
+        "[music][key]sidechaincompress=threshold=0.02:ratio=10:attack=20:release=250"
+        "[ducked];"
+        f"[voice][ducked]amix=inputs=2:duration=first:normalize=0[{out}]"
+    )
+
+
+LONGFORM_ENCODER_ARGS = ["-c:v", "libx264", "-preset", "medium", "-crf", "20"]
+LONGFORM_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
+
+def render_longform(
+    clips_list_file,
+    music_file,
+    output_path,
+    duration=None,
+    copy_video=False,
+    metadata_file=None,
+):
+    """Concatenate, duck music and attach chapters in a single ffmpeg pass.
+
+    duration: expected total length in seconds, used for progress reporting.
+    copy_video: the listed pieces already share codec parameters (smart cut),
+    so join them with stream copy instead of re-encoding the timeline.
+    metadata_file: optional FFMETADATA file whose chapters are attached.
+    The output is written to a unique temporary sibling and renamed into
+    place, so concurrent assembles never share a temp file.
+    Raises FFmpegError when ffmpeg fails.
+    """
     if not HAVE_FFMPEG:
         # cannot run ffmpeg: produce placeholder by touching output
         try:
-            open(temp_out, "wb").close()
+            open(output_path, "wb").close()
         except Exception:
             pass
+        return
+
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", clips_list_file]
+    has_music = bool(music_file and os.path.exists(music_file))
+    if has_music:
+        # loop the music so it always covers the whole timeline
+        cmd += ["-stream_loop", "-1", "-i", music_file]
+    if metadata_file:
+        cmd += ["-i", metadata_file]
+        meta_index = 2 if has_music else 1
+        cmd += ["-map_metadata", str(meta_index), "-map_chapters", str(meta_index)]
+
+    if has_music:
+        ducking = _ducking_filter("0:a", "1:a", "aout")
+        cmd += ["-filter_complex", ducking, "-map", "0:v", "-map", "[aout]"]
+        audio_args = LONGFORM_AUDIO_ARGS
+    else:
+        cmd += ["-map", "0:v", "-map", "0:a?"]
+        audio_args = ["-c:a", "copy"] if copy_video else LONGFORM_AUDIO_ARGS
+
+    if copy_video:
+        cmd += ["-c:v", "copy"]
     else:
-        subprocess.run(concat_cmd, check=False)
+        cmd += LONGFORM_ENCODER_ARGS
+    tmp_out = render_cache.partial_path(output_path)
+    cmd += [*audio_args, tmp_out]
+    try:
+        run_ffmpeg(cmd, duration=duration, label="longform")
+    except Exception:
+        _discard(tmp_out)
+        raise
+    os.replace(tmp_out, output_path)
+
 
-    # Attach music, ducking under speech if possible
+def _fused_longform_cmd(segments, music_file, metadata_file, output_path):
+    """Single encode straight from the sources: every segment is input-seeked
+    to its keyframe, trimmed, concatenated, ducked under music and written
+    with chapters in one filter graph."""
+    cmd = ["ffmpeg", "-y"]
+    graph = []
+    size = None
+    params = smart_cut.probe_stream_params(segments[0].get("source_path"))
+    if params:
+        size = (params["video"].get("width"), params["video"].get("height"))
+    # the whole timeline runs at the first source's rate
+    fps = rate_filter(segments[0].get("source_path"))
+    audio = [has_audio(s.get("source_path")) for s in segments]
+    total = 0.0
+    for i, s in enumerate(segments):
+        plan = plan_seek(s.get("source_path"), s.get("start"), s.get("end"))
+        cmd += ["-ss", str(plan.seek), "-t", str(round(plan.offset + plan.duration, 6))]
+        cmd += ["-i", s.get("source_path")]
+        lo = round(plan.offset, 6)
+        hi = round(plan.offset + plan.duration, 6)
+        total += plan.duration
+        # concat needs identical frame sizes; conform to the first source
+        scale = f"scale={size[0]}:{size[1]}," if size and all(size) else ""
+        graph.append(
+            f"[{i}:v]trim=start={lo}:end={hi},setpts=PTS-STARTPTS,{scale}setsar=1{fps}"
+            f"[v{i}]"
+        )
+        if audio[i]:
+            graph.append(f"[{i}:a]atrim=start={lo}:end={hi},asetpts=PTS-STARTPTS[a{i}]")
+        elif any(audio):
+            # video-only source: silence of the segment's length keeps concat
+            # pairs aligned
+            graph.append(
+                "anullsrc=r=48000:cl=stereo,"
+                f"atrim=duration={round(plan.duration, 6)}[a{i}]"
+            )
+    n = len(segments)
+    if any(audio):
+        graph.append(
+            "".join(f"[v{i}][a{i}]" for i in range(n))
+            + f"concat=n={n}:v=1:a=1[vcat][acat]"
+        )
+        audio_out = "acat"
+    else:
+        graph.append(
+            "".join(f"[v{i}]" for i in range(n)) + f"concat=n={n}:v=1:a=0[vcat]"
+        )
+        audio_out = None
     if music_file and os.path.exists(music_file):
-        music_cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            temp_out,
-            "-i",
-            music_file,
-            "-filter_complex",
-            (
-                "[1:a]volume=0.12[a1];"
-                "[0:a][a1]sidechaincompress=threshold=0.02:ratio=10:attack=20:release=250"
-            ),
-            "-c:v",
-            "copy",
-            output_path,
-        ]
-        if HAVE_FFMPEG:
-            subprocess.run(music_cmd, check=False)
+        cmd += ["-stream_loop", "-1", "-i", music_file]
+        if audio_out:
+            graph.append(_ducking_filter("acat", f"{n}:a", "aout"))
         else:
-            try:
-                os.replace(temp_out, output_path)
-            except Exception:
-                pass
-    else:
-        # no music provided — move temp to output
-        try:
-            os.replace(temp_out, output_path)
-        except Exception:
-            # fallback to copying via ffmpeg
-            if HAVE_FFMPEG:
-                subprocess.run(
-                    ["ffmpeg", "-y", "-i", temp_out, "-c", "copy", output_path],
-                    check=False,
-                )
-            else:
-                try:
-                    open(output_path, "wb").close()
-                except Exception:
-                    pass
+            # nothing to duck under: the music alone, cut to the timeline
+            graph.append(
+                f"[{n}:a]atrim=duration={round(total, 6)},asetpts=PTS-STARTPTS[aout]"
+            )
+        audio_out = "aout"
+        n += 1
+    if metadata_file:
+        cmd += ["-i", metadata_file, "-map_metadata", str(n), "-map_chapters", str(n)]
+    cmd += ["-filter_complex", ";".join(graph)]
+    cmd += ["-map", "[vcat]"]
+    if audio_out:
+        cmd += ["-map", f"[{audio_out}]", *LONGFORM_AUDIO_ARGS]
+    cmd += [*LONGFORM_ENCODER_ARGS, output_path]
+    return cmd
 
 
 def assemble_from_segments(
-    segments, music_file=None, output_path="longform_output.mp4"
+    segments, music_file=None, output_path="longform_output.mp4", smart=True
 ):
     """segments: list of dicts with keys: source_path, start, end, title(optional)
 
-    This will extract each segment to a temp file, create a concat list, and run render_longform.
     It will also create an ffmetadata file with chapters if titles provided.
+
+    With `smart` (the default) and compatible H.264 sources, only the frames
+    around each cut point are re-encoded and the rest is stream-copied (see
+    `smart_cut`). Otherwise the timeline is rendered in a single encode
+    straight from the sources. Either way concat, music ducking and chapters
+    happen in one final ffmpeg pass.
     """
     import tempfile
     import os
@@ -180,34 +505,21 @@ def assemble_from_segments(
     tmpdir = tempfile.mkdtemp(prefix="clipforge_")
     list_file = os.path.join(tmpdir, "clips.txt")
     temp_files = []
-    for i, s in enumerate(segments):
-        src = s.get("source_path")
-        start = s.get("start")
-        end = s.get("end")
-        out = os.path.join(tmpdir, f"seg_{i}.mp4")
-        # extract segment
-        if HAVE_FFMPEG:
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                src,
-                "-ss",
-                str(start),
-                "-to",
-                str(end),
-                "-c",
-                "copy",
-                out,
-            ]
-            subprocess.run(cmd, check=False)
-        else:
-            # create empty placeholder segment file
-            try:
-                open(out, "wb").close()
-            except Exception:
-                pass
-        temp_files.append(out)
+    sources = sorted({s.get("source_path") for s in segments})
+    use_smart_cut = (
+        HAVE_FFMPEG and smart and bool(segments) and smart_cut.can_smart_cut(sources)
+    )
+    if use_smart_cut:
+        for i, s in enumerate(segments):
+            temp_files.extend(
+                smart_cut.extract_segment(
+                    s.get("source_path"),
+                    s.get("start"),
+                    s.get("end"),
+                    tmpdir,
+                    f"seg_{i}",
+                )
+            )
 
     # write concat list
     with open(list_file, "w", encoding="utf-8") as f:
@@ -232,32 +544,31 @@ def assemble_from_segments(
                 f.write(f"title={title}\n")
                 time_acc += dur
 
-    # render longform
-    render_longform(list_file, music_file, output_path)
-
-    # attach metadata chapters if present
-    if has_titles:
-        tmp_out = output_path + ".withmeta.mp4"
-        if HAVE_FFMPEG:
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    output_path,
-                    "-i",
-                    metadata_path,
-                    "-map_metadata",
-                    "1",
-                    "-c",
-                    "copy",
-                    tmp_out,
-                ],
-                check=False,
+    # one pass: concat, music ducking and chapters
+    total = sum(max(0.0, s.get("end", 0.0) - s.get("start", 0.0)) for s in segments)
+    metadata_file = metadata_path if has_titles else None
+    try:
+        if use_smart_cut:
+            render_longform(
+                list_file,
+                music_file,
+                output_path,
+                duration=total,
+                copy_video=True,
+                metadata_file=metadata_file,
             )
-        try:
+        elif HAVE_FFMPEG and segments:
+            tmp_out = render_cache.partial_path(output_path)
+            cmd = _fused_longform_cmd(segments, music_file, metadata_file, tmp_out)
+            try:
+                run_ffmpeg(cmd, duration=total, label="longform")
+            except Exception:
+                _discard(tmp_out)
+                raise
             os.replace(tmp_out, output_path)
-        except Exception:
-            pass
+        else:
+            render_longform(list_file, music_file, output_path)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
 
     return output_path
@@ -2,7 +2,8 @@
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
-from ffmpeg_renderer import render_short
+import ffmpeg_renderer
+from render_scheduler import get_scheduler
 
 
 def _ensure_output_dir(path):
@@ -11,27 +12,42 @@ def _ensure_output_dir(path):
         os.makedirs(d, exist_ok=True)
 
 
-def render_short_cached(task):
+def render_short_cached(task, threads=None):
     """task: dict with keys: source, start, end, srt_path, output_path
 
-    Will skip rendering if `output_path` exists and is newer than source file.
+    Goes through the shared render cache (see `render_cache`), so outputs are
+    reused only when source, range, subtitles and encoder settings all match.
     """
-    src = task.get("source")
     out = task.get("output_path")
     _ensure_output_dir(out)
     try:
-        if os.path.exists(out):
-            if src and os.path.exists(src):
-                if os.path.getmtime(out) >= os.path.getmtime(src):
-                    return {"output": out, "skipped": True}
-        # call renderer
-        render_short(src, task.get("start"), task.get("end"), task.get("srt_path"), out)
-        return {"output": out, "skipped": False}
+        return ffmpeg_renderer.render_short_cached(
+            task.get("source"),
+            task.get("start"),
+            task.get("end"),
+            task.get("srt_path"),
+            out,
+            threads=threads,
+        )
     except Exception as e:
         return {"error": str(e)}
 
 
-def render_batch_parallel(tasks, max_workers=4):
+def _task_seconds(task):
+    return float(task.get("end")) - float(task.get("start"))
+
+
+def render_batch_parallel(tasks, max_workers=None):
+    """Render tasks concurrently.
+
+    With `max_workers` unset the CPU-aware scheduler sizes the number of
+    concurrent ffmpeg processes and their `-threads`; a number keeps the old
+    fixed pool (useful for comparisons).
+    """
+    if max_workers is None:
+        return get_scheduler().run(
+            tasks, render_short_cached, media_seconds=_task_seconds
+        )
     results = []
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
         futures = {ex.submit(render_short_cached, t): t for t in tasks}
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from rq import Queue
 from rq.job import Job
 from redis import Redis
 import os
+import db
+import render_cache
+import transcript_cache
 
 router = APIRouter(prefix="/jobs")
 
@@ -11,10 +14,38 @@ redis_conn = Redis.from_url(redis_url)
 queue = Queue(connection=redis_conn)
 
 
+@router.get("/render_cache/stats")
+def render_cache_stats():
+    return render_cache.stats()
+
+
+@router.get("/transcript_cache/stats")
+def transcript_cache_stats():
+    return transcript_cache.stats()
+
+
+@router.post("/analytics/backfill")
+def analytics_backfill(background_tasks: BackgroundTasks):
+    """Rebuild the event rollups behind get_user_analytics from raw events."""
+    try:
+        job = queue.enqueue(db.backfill_event_rollups)
+        return {"status": "queued", "via_rq": True, "job_id": job.get_id()}
+    except Exception:
+        background_tasks.add_task(db.backfill_event_rollups)
+        return {"status": "queued", "via_rq": False, "job_id": None}
+
+
 @router.get("/{job_id}")
 def job_status(job_id: str):
     try:
         job = Job.fetch(job_id, connection=redis_conn)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
-    return {"id": job.get_id(), "status": job.get_status(), "result": str(job.result)}
+    status = job.get_status()
+    out = {"id": job.get_id(), "status": status, "result": str(job.result)}
+    # per-render progress written by ffmpeg_progress (percent, fps, speed, eta)
+    out["renders"] = job.meta.get("renders", {})
+    if status == "failed":
+        lines = (job.exc_info or "").strip().splitlines()
+        out["error"] = lines[-1] if lines else None
+    return out
@@ -1,42 +1,45 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-import db
-import datetime
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+import quota
 
 
-class QuotaMiddleware(BaseHTTPMiddleware):
+class QuotaMiddleware:
+    """Reject requests of free-tier users over their daily clip quota.
+
+    The user comes from the X-User-Id header. Tier and today's count come
+    from `quota`'s cache and counters, so a request costs no database query.
+    Plain ASGI rather than BaseHTTPMiddleware: this runs on every request and
+    must not add a task and stream wrapper to each one. The check itself is
+    blocking (Redis, and the database on a cache miss), so it runs in the
+    threadpool rather than on the event loop.
+    """
+
     def __init__(self, app, free_limit_per_day=10):
-        super().__init__(app)
+        self.app = app
         self.free_limit_per_day = free_limit_per_day
 
-    async def dispatch(self, request: Request, call_next):
-        # simple quota: if X-User-Id header maps to free tier and they have created too many clips today, block
-        user_id = request.headers.get("X-User-Id")
-        if user_id:
-            session = db.SessionLocal()
-            try:
-                user = session.query(db.User).filter_by(id=int(user_id)).first()
-                if user and user.tier == "free":
-                    # count events of type clip_created today
-                    today = datetime.datetime.utcnow().date()
-                    from sqlalchemy import func
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith("/static"):
+            user_id = None
+            for name, value in scope["headers"]:
+                if name == b"x-user-id":
+                    user_id = value.decode("latin-1")
+                    break
+            if user_id:
+                response = await run_in_threadpool(self._check, user_id)
+                if response is not None:
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
 
-                    start = datetime.datetime(today.year, today.month, today.day)
-                    cnt = (
-                        session.query(func.count(db.Event.id))
-                        .filter(
-                            db.Event.user_id == user.id,
-                            db.Event.event_type == "clip_created",
-                            db.Event.created_at >= start,
-                        )
-                        .scalar()
-                        or 0
-                    )
-                    if cnt >= self.free_limit_per_day:
-                        raise HTTPException(
-                            status_code=429,
-                            detail="Free tier daily clip creation limit reached",
-                        )
-            finally:
-                session.close()
-        return await call_next(request)
+    def _check(self, user_id):
+        try:
+            uid = int(user_id)
+        except ValueError:
+            return JSONResponse({"detail": "Invalid X-User-Id"}, status_code=400)
+        if quota.over_daily_limit(uid, self.free_limit_per_day):
+            return JSONResponse(
+                {"detail": "Free tier daily clip creation limit reached"},
+                status_code=429,
+            )
+        return None
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Body, HTTPException
 import db
 from fastapi import BackgroundTasks
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 from fastapi import Request
 import os
 import json
-from ffmpeg_renderer import render_short
+import uuid
+from typing import Dict, Optional
+from urllib.parse import urlencode
+import numpy as np
+from clipscoring import viral_scores
+from ffmpeg_renderer import (
+    decode_groups,
+    render_short_cached,
+    render_shorts_from_source,
+    short_signature,
+)
+from ffmpeg_progress import FFmpegError
+from render_locks import claim_inflight, inflight_key, release_inflight
 from srt_util import segments_to_srt
 from longform_builder import arrange_for_longform
 from ffmpeg_renderer import assemble_from_segments
@@ -19,6 +31,8 @@ from ai_content import (
 from db import get_user_analytics
 from redis import Redis
 from rq import Queue
+from rq.job import Job
+from rq.exceptions import NoSuchJobError
 
 redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 redis_conn = Redis.from_url(redis_url)
@@ -28,44 +42,113 @@ templates = Jinja2Templates(directory="templates")
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "outputs", "shorts")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+PROXY_DIR = os.path.join(os.path.dirname(__file__), "outputs", "proxies")
+os.makedirs(PROXY_DIR, exist_ok=True)
+
+# Batch render jobs are cut to at most this many clips / clip seconds, and
+# each gets an RQ timeout of a fixed allowance plus so many wall seconds per
+# clip second; one job per long source would outlive RQ's 180 s default.
+RENDER_JOB_MAX_CLIPS = int(os.environ.get("CLIPFORGE_RENDER_JOB_MAX_CLIPS", "16"))
+RENDER_JOB_MAX_SECONDS = float(
+    os.environ.get("CLIPFORGE_RENDER_JOB_MAX_SECONDS", "600")
+)
+RENDER_JOB_TIMEOUT_BASE = 120
+RENDER_JOB_TIMEOUT_PER_SECOND = float(
+    os.environ.get("CLIPFORGE_RENDER_JOB_TIMEOUT_PER_SECOND", "4")
+)
 
 router = APIRouter(prefix="/projects")
 
 
+def _clip_page(session, project_id, columns, limit, cursor, filters):
+    try:
+        return db.clip_page(
+            session, project_id, columns=columns, limit=limit, cursor=cursor, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page_filters(approved, emotion, min_score, max_score):
+    return {
+        "approved": approved,
+        "emotion": emotion,
+        "min_score": min_score,
+        "max_score": max_score,
+    }
+
+
 @router.get("/{project_id}/clips")
-def list_clips(project_id: int, limit: int = 100):
+def list_clips(
+    project_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    approved: Optional[str] = None,
+    emotion: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    include_metadata: bool = False,
+):
+    """A page of clips, best first; pass `next_cursor` back as `cursor`."""
     session = db.SessionLocal()
     try:
         proj = session.query(db.Project).filter_by(id=project_id).first()
         if not proj:
             raise HTTPException(status_code=404, detail="Project not found")
-        clips = db.get_clips_for_project(session, project_id, limit=limit)
+        columns = db.CLIP_LIST_COLUMNS
+        if include_metadata:
+            columns += (db.Clip.metadata_json,)
+        clips, next_cursor = _clip_page(
+            session,
+            project_id,
+            columns,
+            limit,
+            cursor,
+            _page_filters(approved, emotion, min_score, max_score),
+        )
         out = []
         for c in clips:
-            out.append(
-                {
-                    "clip_id": c.clip_id,
-                    "start": c.start,
-                    "end": c.end,
-                    "duration": c.duration,
-                    "score": c.score,
-                    "emotion": c.emotion,
-                    "metadata": c.metadata_json,
-                }
-            )
-        return {"project": proj.name, "clips": out}
+            item = {
+                "clip_id": c.clip_id,
+                "start": c.start,
+                "end": c.end,
+                "duration": c.duration,
+                "score": c.score,
+                "emotion": c.emotion,
+                "approved": c.approved,
+                "proxy_path": c.proxy_path,
+            }
+            if include_metadata:
+                item["metadata"] = c.metadata_json
+            out.append(item)
+        return {"project": proj.name, "clips": out, "next_cursor": next_cursor}
     finally:
         session.close()
 
 
 @router.get("/{project_id}/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request, project_id: int):
+def dashboard(
+    request: Request,
+    project_id: int,
+    cursor: Optional[str] = None,
+    approved: Optional[str] = None,
+    emotion: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
     session = db.SessionLocal()
     try:
         proj = session.query(db.Project).filter_by(id=project_id).first()
         if not proj:
             raise HTTPException(status_code=404, detail="Project not found")
-        clips = db.get_clips_for_project(session, project_id, limit=200)
+        filters = _page_filters(approved, emotion, min_score, max_score)
+        clips, next_cursor = _clip_page(
+            session, project_id, db.CLIP_LIST_COLUMNS, 200, cursor, filters
+        )
+        next_query = None
+        if next_cursor:
+            params = {k: v for k, v in filters.items() if v is not None}
+            next_query = urlencode(dict(params, cursor=next_cursor))
         # analytics for project owner if available
         owner_analytics = None
         if proj.owner_id:
@@ -76,6 +159,7 @@ def dashboard(request: Request, project_id: int):
                 "request": request,
                 "project": proj,
                 "clips": clips,
+                "next_query": next_query,
                 "analytics": owner_analytics,
             },
         )
@@ -119,7 +203,31 @@ def reject_clip(project_id: int, clip_id: str):
         session.close()
 
 
-def _render_and_update(clip_id, project_id):
+def _render_inflight_key(c):
+    """In-flight key covering everything a request changes about a render."""
+    params = {
+        "source": c.source_path,
+        "start": c.start,
+        "end": c.end,
+        "text": c.text or "",
+        "signature": short_signature(),
+    }
+    return inflight_key(c.clip_id, params)
+
+
+def _job_alive(job_id):
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        return False
+    except Exception:
+        # can't tell (e.g. Redis down, claim is process-local): trust the claim
+        return True
+    return job.get_status() in ("queued", "started", "deferred", "scheduled")
+
+
+def _render_and_update(clip_id, project_id, inflight=None):
+    """Render one clip; `inflight` is the (key, job_id) claim to release."""
     session = db.SessionLocal()
     try:
         c = (
@@ -129,26 +237,33 @@ def _render_and_update(clip_id, project_id):
         )
         if not c:
             return
-        metadata = json.loads(c.metadata_json or "{}")
-        source = metadata.get("source_path")
+        source = c.source_path
         if not source or not os.path.exists(source):
             c.renderer_status = "missing_source"
             session.commit()
             return
 
         # recreate srt from stored text if available
-        segments = [{"start": c.start, "end": c.end, "text": metadata.get("text", "")}]
+        segments = [{"start": c.start, "end": c.end, "text": c.text or ""}]
         srt_path = os.path.join(OUTPUT_DIR, f"{clip_id}.srt")
         segments_to_srt(segments, srt_path)
         out_path = os.path.join(OUTPUT_DIR, f"{clip_id}.mp4")
         c.renderer_status = "rendering"
         session.commit()
-        render_short(source, c.start, c.end, srt_path, out_path)
+        try:
+            render_short_cached(source, c.start, c.end, srt_path, out_path)
+        except FFmpegError:
+            # let RQ record the failure; the clip must not look rendered
+            c.renderer_status = "failed"
+            session.commit()
+            raise
         c.output_path = out_path
         c.renderer_status = "rendered"
         session.commit()
     finally:
         session.close()
+        if inflight:
+            release_inflight(*inflight)
 
 
 @router.post("/{project_id}/clips/{clip_id}/render")
@@ -163,21 +278,132 @@ def render_clip(project_id: int, clip_id: str, background_tasks: BackgroundTasks
         )
         if not c:
             raise HTTPException(status_code=404)
+        # repeated requests for the same clip and parameters join the job
+        # that is already rendering it
+        key = _render_inflight_key(c)
+        job_id = uuid.uuid4().hex
+        holder = claim_inflight(key, job_id, is_alive=_job_alive)
+        if holder is not None:
+            return {"status": "already_queued", "job_id": holder}
+        inflight = (key, job_id)
         # enqueue via RQ so workers can process
         try:
-            job = rq_queue.enqueue(_render_and_update, clip_id, project_id)
+            rq_queue.enqueue(
+                _render_and_update, clip_id, project_id, inflight, job_id=job_id
+            )
             queued = True
-            job_id = job.get_id()
         except Exception:
             # fallback to background tasks
-            background_tasks.add_task(_render_and_update, clip_id, project_id)
+            background_tasks.add_task(_render_and_update, clip_id, project_id, inflight)
             queued = False
-            job_id = None
         return {"status": "queued", "via_rq": queued, "job_id": job_id}
     finally:
         session.close()
 
 
+def _clip_seconds(c):
+    return max(0.0, (c.end or 0.0) - (c.start or 0.0))
+
+
+def _render_jobs(clips):
+    """Split clips into job-sized groups of one source each, in timeline order.
+
+    clips: objects with clip_id, source_path, start and end.
+    """
+    jobs = []
+    seconds = 0.0
+    for c in sorted(clips, key=lambda c: (c.source_path or "", c.start or 0.0)):
+        if (
+            not jobs
+            or jobs[-1][0].source_path != c.source_path
+            or len(jobs[-1]) >= RENDER_JOB_MAX_CLIPS
+            or seconds + _clip_seconds(c) > RENDER_JOB_MAX_SECONDS
+        ):
+            jobs.append([])
+            seconds = 0.0
+        jobs[-1].append(c)
+        seconds += _clip_seconds(c)
+    return jobs
+
+
+def _job_timeout(media_seconds):
+    return int(RENDER_JOB_TIMEOUT_BASE + RENDER_JOB_TIMEOUT_PER_SECOND * media_seconds)
+
+
+def _render_batch_and_update(clip_ids, project_id, inflight=None):
+    """Render several clips that share a source, one decode per decode group.
+
+    Status updates per clip mirror `_render_and_update` and are committed
+    after every decode group, so a job killed midway keeps what finished;
+    clips it never got to are marked failed. inflight: job id and the
+    in-flight keys it claimed, released when the batch ends.
+    """
+    session = db.SessionLocal()
+    try:
+        clips = (
+            session.query(db.Clip)
+            .filter(db.Clip.project_id == project_id, db.Clip.clip_id.in_(clip_ids))
+            .all()
+        )
+        by_source = {}
+        for c in clips:
+            source = c.source_path
+            if not source or not os.path.exists(source):
+                c.renderer_status = "missing_source"
+                continue
+            segments = [{"start": c.start, "end": c.end, "text": c.text or ""}]
+            srt_path = os.path.join(OUTPUT_DIR, f"{c.clip_id}.srt")
+            segments_to_srt(segments, srt_path)
+            c.renderer_status = "rendering"
+            by_source.setdefault(source, []).append(
+                (
+                    c,
+                    {
+                        "start": c.start,
+                        "end": c.end,
+                        "srt_path": srt_path,
+                        "output_path": os.path.join(OUTPUT_DIR, f"{c.clip_id}.mp4"),
+                    },
+                )
+            )
+        session.commit()
+
+        failed = []
+        try:
+            for source, items in by_source.items():
+                tasks = [task for _, task in items]
+                for group in decode_groups(tasks):
+                    results = render_shorts_from_source(
+                        source, [tasks[i] for i in group]
+                    )
+                    for i, res in zip(group, results):
+                        c, task = items[i]
+                        if res.get("error"):
+                            c.renderer_status = "failed"
+                            failed.append(c.clip_id)
+                            continue
+                        c.output_path = task["output_path"]
+                        c.renderer_status = "rendered"
+                    session.commit()
+        except Exception:
+            # e.g. RQ's job timeout: don't leave the rest looking in progress
+            session.rollback()
+            for items in by_source.values():
+                for c, _ in items:
+                    if c.renderer_status == "rendering":
+                        c.renderer_status = "failed"
+            session.commit()
+            raise
+        if failed:
+            raise RuntimeError(f"Render failed for clips: {', '.join(failed)}")
+    finally:
+        session.close()
+        if inflight:
+            job_id, keys = inflight
+            for key in keys:
+                release_inflight(key, job_id)
+
+
 @router.post("/{project_id}/clips/render_batch")
 def render_batch(project_id: int, background_tasks: BackgroundTasks):
     session = db.SessionLocal()
@@ -189,32 +415,268 @@ def render_batch(project_id: int, background_tasks: BackgroundTasks):
         )
         if not clips:
             raise HTTPException(status_code=400, detail="No approved clips")
+        # bounded jobs per source; clips close together share a decode
         ids = []
-        for c in clips:
-            ids.append(c.clip_id)
+        already = {}
+        jobs = 0
+        for group in _render_jobs(clips):
+            job_id = uuid.uuid4().hex
+            clip_ids, keys = [], []
+            seconds = 0.0
+            for c in group:
+                key = _render_inflight_key(c)
+                holder = claim_inflight(key, job_id, is_alive=_job_alive)
+                if holder is not None:
+                    # already rendering (or queued) with the same parameters
+                    already[c.clip_id] = holder
+                    continue
+                clip_ids.append(c.clip_id)
+                keys.append(key)
+                seconds += _clip_seconds(c)
+            if not clip_ids:
+                continue
+            ids.extend(clip_ids)
+            jobs += 1
+            inflight = (job_id, keys)
             try:
-                rq_queue.enqueue(_render_and_update, c.clip_id, project_id)
+                rq_queue.enqueue(
+                    _render_batch_and_update,
+                    clip_ids,
+                    project_id,
+                    inflight,
+                    job_id=job_id,
+                    job_timeout=_job_timeout(seconds),
+                )
             except Exception:
-                background_tasks.add_task(_render_and_update, c.clip_id, project_id)
-        return {"queued": len(ids)}
+                background_tasks.add_task(
+                    _render_batch_and_update, clip_ids, project_id, inflight
+                )
+        return {"queued": len(ids), "jobs": jobs, "already_queued": already}
     finally:
         session.close()
 
 
-@router.get("/{project_id}/timeline")
-def timeline_preview(project_id: int):
+def _render_proxies_and_update(clip_ids, project_id):
+    """Render review proxies for clips that share a source, one decode per
+    decode group, committing each group's proxy paths as it finishes.
+
+    Only `proxy_path` is touched; `renderer_status` stays reserved for the
+    full-quality render.
+    """
     session = db.SessionLocal()
     try:
         clips = (
             session.query(db.Clip)
-            .filter_by(project_id=project_id)
-            .order_by(db.Clip.score.desc())
+            .filter(db.Clip.project_id == project_id, db.Clip.clip_id.in_(clip_ids))
             .all()
         )
+        by_source = {}
+        for c in clips:
+            source = c.source_path
+            if not source or not os.path.exists(source):
+                continue
+            by_source.setdefault(source, []).append(
+                (
+                    c,
+                    {
+                        "start": c.start,
+                        "end": c.end,
+                        "output_path": os.path.join(PROXY_DIR, f"{c.clip_id}.mp4"),
+                    },
+                )
+            )
+
+        failed = []
+        for source, items in by_source.items():
+            tasks = [task for _, task in items]
+            for group in decode_groups(tasks):
+                results = render_shorts_from_source(
+                    source, [tasks[i] for i in group], proxy=True
+                )
+                for i, res in zip(group, results):
+                    c, task = items[i]
+                    if res.get("error") or not os.path.exists(task["output_path"]):
+                        failed.append(c.clip_id)
+                        continue
+                    c.proxy_path = task["output_path"]
+                session.commit()
+        if failed:
+            raise RuntimeError(f"Proxy render failed for clips: {', '.join(failed)}")
+    finally:
+        session.close()
+
+
+def enqueue_proxy_renders(project_id, clip_ids=None, background_tasks=None):
+    """Queue proxy renders for a project's clips in bounded jobs per source.
+
+    clip_ids: restrict to these clips; by default every clip without a proxy.
+    Jobs are cut like batch renders (see `_render_jobs`) and get a timeout
+    sized by their clip seconds. Without RQ the work goes to
+    `background_tasks`, or runs inline. Returns the number of jobs.
+    """
+    session = db.SessionLocal()
+    try:
+        q = session.query(db.Clip).filter(db.Clip.project_id == project_id)
+        if clip_ids is not None:
+            q = q.filter(db.Clip.clip_id.in_(clip_ids))
+        else:
+            q = q.filter(db.Clip.proxy_path.is_(None))
+        jobs = _render_jobs(
+            q.with_entities(
+                db.Clip.clip_id, db.Clip.source_path, db.Clip.start, db.Clip.end
+            ).all()
+        )
+    finally:
+        session.close()
+    for job in jobs:
+        ids = [c.clip_id for c in job]
+        timeout = _job_timeout(sum(_clip_seconds(c) for c in job))
+        try:
+            rq_queue.enqueue(
+                _render_proxies_and_update, ids, project_id, job_timeout=timeout
+            )
+        except Exception:
+            if background_tasks is not None:
+                background_tasks.add_task(_render_proxies_and_update, ids, project_id)
+            else:
+                _render_proxies_and_update(ids, project_id)
+    return len(jobs)
+
+
+@router.post("/{project_id}/proxies")
+def render_proxies(project_id: int, background_tasks: BackgroundTasks):
+    """(Re)queue review proxies for every clip that has none yet."""
+    jobs = enqueue_proxy_renders(project_id, background_tasks=background_tasks)
+    return {"status": "queued", "jobs": jobs}
+
+
+@router.get("/{project_id}/clips/{clip_id}/proxy")
+def clip_proxy(project_id: int, clip_id: str):
+    session = db.SessionLocal()
+    try:
+        c = (
+            session.query(db.Clip)
+            .filter_by(clip_id=clip_id, project_id=project_id)
+            .first()
+        )
+        if not c or not c.proxy_path or not os.path.exists(c.proxy_path):
+            raise HTTPException(status_code=404, detail="Proxy not rendered")
+        return FileResponse(c.proxy_path, media_type="video/mp4")
+    finally:
+        session.close()
+
+
+RESCORE_BATCH_SIZE = 50000
+
+
+def _rescore_and_update(project_id=None, weights=None):
+    """Recompute clip scores from the features stored with each clip.
+
+    project_id: limit to one project; None rescores every clip. weights:
+    emotion weight overrides on top of `clipscoring.EMOTION_WEIGHTS`.
+    Clips are read in keyset batches by primary key, scored with NumPy, and
+    only rows whose score changed are written back, one commit per batch, so
+    memory stays flat however many clips there are. Returns counts of
+    scanned and updated clips.
+    """
+    from clipscoring import EMOTION_WEIGHTS
+
+    merged = dict(EMOTION_WEIGHTS, **(weights or {}))
+    session = db.SessionLocal()
+    scanned = updated = 0
+    last_id = 0
+    try:
+        while True:
+            q = session.query(
+                db.Clip.id,
+                db.Clip.score,
+                db.Clip.emotion,
+                db.Clip.duration,
+                db.Clip.audio_energy,
+                db.Clip.speech_markers,
+            ).filter(db.Clip.id > last_id)
+            if project_id is not None:
+                q = q.filter(db.Clip.project_id == project_id)
+            batch = q.order_by(db.Clip.id).limit(RESCORE_BATCH_SIZE).all()
+            if not batch:
+                break
+            ids, old, emotions, durations, energy, markers = zip(*batch)
+            last_id = ids[-1]
+            new = viral_scores(
+                emotions,
+                [e or 0.0 for e in energy],
+                [m or 0 for m in markers],
+                [d or 0.0 for d in durations],
+                weights=merged,
+            )
+            old = np.array([np.nan if v is None else v for v in old], dtype=float)
+            mask = ~np.isclose(new, old)
+            updated += db.bulk_update_clip_scores(
+                session, np.asarray(ids)[mask].tolist(), new[mask].tolist()
+            )
+            scanned += len(batch)
+        return {"scanned": scanned, "updated": updated}
+    finally:
+        session.close()
+
+
+def _enqueue_rescore(project_id, weights, background_tasks):
+    try:
+        job = rq_queue.enqueue(_rescore_and_update, project_id, weights)
+        return {"status": "queued", "via_rq": True, "job_id": job.get_id()}
+    except Exception:
+        background_tasks.add_task(_rescore_and_update, project_id, weights)
+        return {"status": "queued", "via_rq": False, "job_id": None}
+
+
+@router.post("/rescore")
+def rescore_all(
+    background_tasks: BackgroundTasks, weights: Dict[str, float] = Body(None)
+):
+    """Rescore every clip, optionally with emotion weight overrides."""
+    return _enqueue_rescore(None, weights, background_tasks)
+
+
+@router.post("/{project_id}/rescore")
+def rescore_project(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    weights: Dict[str, float] = Body(None),
+):
+    return _enqueue_rescore(project_id, weights, background_tasks)
+
+
+@router.get("/{project_id}/timeline")
+def timeline_preview(
+    project_id: int,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    approved: Optional[str] = None,
+    emotion: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
+    session = db.SessionLocal()
+    try:
+        clips, next_cursor = _clip_page(
+            session,
+            project_id,
+            (
+                db.Clip.clip_id,
+                db.Clip.start,
+                db.Clip.end,
+                db.Clip.duration,
+                db.Clip.score,
+                db.Clip.emotion,
+                db.Clip.text,
+            ),
+            limit,
+            cursor,
+            _page_filters(approved, emotion, min_score, max_score),
+        )
         # return minimal timeline info
         out = []
         for c in clips:
-            md = json.loads(c.metadata_json or "{}")
             out.append(
                 {
                     "clip_id": c.clip_id,
@@ -223,10 +685,10 @@ def timeline_preview(project_id: int):
                     "duration": c.duration,
                     "score": c.score,
                     "emotion": c.emotion,
-                    "text": md.get("text"),
+                    "text": c.text,
                 }
             )
-        return {"timeline": out}
+        return {"timeline": out, "next_cursor": next_cursor}
     finally:
         session.close()
 
@@ -250,17 +712,16 @@ def assemble_longform(
         # prepare segment dicts for arrangement
         segs = []
         for c in clips:
-            md = json.loads(c.metadata_json or "{}")
             segs.append(
                 {
                     "clip_id": c.clip_id,
-                    "source_path": md.get("source_path"),
+                    "source_path": c.source_path,
                     "start": c.start,
                     "end": c.end,
                     "duration": c.duration,
                     "score": c.score,
                     "emotion": c.emotion,
-                    "title": md.get("text", ""),
+                    "title": c.text or "",
                 }
             )
 
@@ -299,8 +760,7 @@ def generate_titles(project_id: int, clip_id: str, count: int = 5):
         )
         if not c:
             raise HTTPException(status_code=404)
-        md = json.loads(c.metadata_json or "{}")
-        text = md.get("text", "")
+        text = c.text or ""
         titles = generate_titles_from_text(text, n=count)
         c.title_suggestions = json.dumps(titles)
         session.commit()
@@ -320,18 +780,17 @@ def generate_thumb(project_id: int, clip_id: str):
         )
         if not c:
             raise HTTPException(status_code=404)
-        md = json.loads(c.metadata_json or "{}")
-        src = md.get("source_path")
+        src = c.source_path
         if not src or not os.path.exists(src):
             raise HTTPException(
-                status_code=400, detail="source_path missing or not found in metadata"
+                status_code=400, detail="source_path missing or not found"
             )
         # choose frame: middle of clip
         t = (c.start + c.end) / 2.0
         out_dir = os.path.join(os.path.dirname(__file__), "outputs", "thumbnails")
         os.makedirs(out_dir, exist_ok=True)
         out = os.path.join(out_dir, f"{clip_id}.jpg")
-        overlay = (json.loads(c.metadata_json or "{}")).get("text", "")
+        overlay = c.text or ""
         generate_thumbnail(src, t, overlay, out)
         c.thumbnail_path = out
         session.commit()
@@ -351,8 +810,7 @@ def generate_script(project_id: int, clip_id: str, tone: str = "energetic"):
         )
         if not c:
             raise HTTPException(status_code=404)
-        md = json.loads(c.metadata_json or "{}")
-        text = md.get("text", "")
+        text = c.text or ""
         script = generate_script_from_text(
             text, tone=tone, target_seconds=int(c.duration)
         )
@@ -0,0 +1,152 @@
+"""Per-user clip quota counters, so quota checks don't query the database.
+
+Each user has one counter of clip_created events per UTC day (the same
+window the quota has always used: since midnight UTC). `QuotaMiddleware`
+reads it together with the user's tier, which is cached for
+CLIPFORGE_TIER_CACHE_TTL seconds.
+
+Every value stored in a counter is a count of the events table, and a store
+only ever raises it: `db.record_event` re-counts after committing a
+clip_created event, and a check seeds a missing counter (first check of the
+day, Redis flushed, counters newly deployed) the same way. A seed counted
+just before an event commits can land after that event's store, but it can
+never lower the counter, so no event is lost or counted twice. Checks cost
+no database round trip once the counter exists.
+
+Counters live in Redis (a key that expires after the day) so every web and
+worker process sees the same count. Without Redis they fall back to
+process-local counters that are re-read from the database every
+LOCAL_COUNT_TTL seconds, since events recorded by other processes are not
+seen otherwise.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+import db
+from redis_client import get_redis, mark_redis_down
+
+COUNTER_PREFIX = "clipforge:quota:clip_created:"
+# counters outlive their day a little so late readers still see them
+COUNTER_TTL = 2 * 24 * 3600
+TIER_TTL = float(os.environ.get("CLIPFORGE_TIER_CACHE_TTL", "60"))
+LOCAL_COUNT_TTL = 30.0
+
+# raise the counter to a fresh count, never lower it: counts only grow
+# within a day, so the larger of two counts is the more recent one
+_RAISE_TO = """
+local current = tonumber(redis.call('get', KEYS[1]) or '-1')
+local count = tonumber(ARGV[1])
+if count > current then
+    redis.call('set', KEYS[1], count, 'EX', ARGV[2])
+    return count
+end
+return current
+"""
+
+_local_counts = {}  # (user_id, day) -> [count, expires_at]
+_tiers = {}  # user_id -> (tier, expires_at)
+_lock = threading.Lock()
+
+
+def _today():
+    return datetime.datetime.utcnow().date()
+
+
+def _counter_key(user_id, day):
+    return f"{COUNTER_PREFIX}{user_id}:{day:%Y%m%d}"
+
+
+def _count_from_db(user_id, day):
+    from sqlalchemy import func
+
+    start = datetime.datetime(day.year, day.month, day.day)
+    session = db.SessionLocal()
+    try:
+        return int(
+            session.query(func.count(db.Event.id))
+            .filter(
+                db.Event.user_id == user_id,
+                db.Event.event_type == "clip_created",
+                db.Event.created_at >= start,
+            )
+            .scalar()
+            or 0
+        )
+    finally:
+        session.close()
+
+
+def user_tier(user_id):
+    """Tier of `user_id` (None for unknown users), cached for TIER_TTL."""
+    now = time.monotonic()
+    with _lock:
+        cached = _tiers.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    session = db.SessionLocal()
+    try:
+        tier = session.query(db.User.tier).filter_by(id=user_id).scalar()
+    finally:
+        session.close()
+    with _lock:
+        _tiers[user_id] = (tier, now + TIER_TTL)
+    return tier
+
+
+def _store_local(user_id, day, count, expires_at):
+    with _lock:
+        # drop counters of earlier days
+        for stale in [k for k in _local_counts if k[1] != day]:
+            del _local_counts[stale]
+        entry = _local_counts.get((user_id, day))
+        if entry is not None:
+            count = max(count, entry[0])
+        _local_counts[(user_id, day)] = [count, expires_at]
+    return count
+
+
+def record_clip_created(user_id):
+    """Update today's counter after a clip_created event was committed."""
+    day = _today()
+    count = _count_from_db(user_id, day)
+    conn = get_redis()
+    if conn is not None:
+        try:
+            conn.eval(_RAISE_TO, 1, _counter_key(user_id, day), count, COUNTER_TTL)
+            return
+        except Exception:
+            mark_redis_down()
+    _store_local(user_id, day, count, time.monotonic() + LOCAL_COUNT_TTL)
+
+
+def clips_created_today(user_id):
+    """clip_created events of `user_id` since midnight UTC."""
+    day = _today()
+    key = _counter_key(user_id, day)
+    conn = get_redis()
+    if conn is not None:
+        try:
+            raw = conn.get(key)
+            if raw is not None:
+                return int(raw)
+            seeded = _count_from_db(user_id, day)
+            return int(conn.eval(_RAISE_TO, 1, key, seeded, COUNTER_TTL))
+        except Exception:
+            mark_redis_down()
+    now = time.monotonic()
+    with _lock:
+        entry = _local_counts.get((user_id, day))
+        if entry is not None and entry[1] > now:
+            return entry[0]
+    seeded = _count_from_db(user_id, day)
+    return _store_local(user_id, day, seeded, now + LOCAL_COUNT_TTL)
+
+
+def over_daily_limit(user_id, free_limit_per_day):
+    """True when a free-tier user has used up today's clip quota."""
+    if user_tier(user_id) != "free":
+        return False
+    return clips_created_today(user_id) >= free_limit_per_day
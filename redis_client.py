@@ -0,0 +1,46 @@
+"""Shared, lazily created Redis client for caches, locks and counters.
+
+Modules that can fall back to process-local state call `get_redis()` and
+report failures with `mark_redis_down()`. After a failure Redis is skipped for
+CLIPFORGE_REDIS_RETRY_SECONDS, so an outage doesn't cost a connect timeout per
+call, and then tried again; a single blip no longer switches a process to
+local state for good.
+"""
+
+import os
+import threading
+import time
+
+RETRY_SECONDS = float(os.environ.get("CLIPFORGE_REDIS_RETRY_SECONDS", "5"))
+
+_client = None
+_down_until = 0.0
+_lock = threading.Lock()
+
+
+def get_redis():
+    """The shared client, or None while Redis is unavailable."""
+    global _client
+    if time.monotonic() < _down_until:
+        return None
+    if _client is None:
+        with _lock:
+            if _client is None:
+                try:
+                    from redis import Redis
+
+                    _client = Redis.from_url(
+                        os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+                        socket_connect_timeout=0.2,
+                        socket_timeout=1.0,
+                    )
+                except Exception:
+                    # redis-py missing or a bad URL: no point retrying
+                    _client = False
+    return _client or None
+
+
+def mark_redis_down():
+    """Skip Redis for RETRY_SECONDS after a failed call."""
+    global _down_until
+    _down_until = time.monotonic() + RETRY_SECONDS
@@ -0,0 +1,223 @@
+"""Content-addressed cache for rendered shorts.
+
+A render is identified by everything that determines its pixels: the source
+file identity, the time range, the subtitle text and the filter/encoder
+signature. Artifacts live under `CLIPFORGE_RENDER_CACHE_DIR` named by that key,
+are written atomically and evicted least-recently-used first once the cache
+grows past `CLIPFORGE_RENDER_CACHE_BYTES`.
+
+Hit/miss/eviction counters are kept in-process and, when Redis is reachable,
+mirrored to a Redis hash so counts from forked RQ jobs add up.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from redis_client import get_redis, mark_redis_down
+
+CACHE_DIR = os.environ.get(
+    "CLIPFORGE_RENDER_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "outputs", "render_cache"),
+)
+CACHE_BUDGET_BYTES = int(
+    os.environ.get("CLIPFORGE_RENDER_CACHE_BYTES", str(20 * 1024**3))
+)
+STATS_KEY = "clipforge:render_cache:stats"
+# the running size estimate is re-measured at least this often, since other
+# processes store into the same directory
+RESCAN_SECONDS = 300.0
+# once over budget, evict down to this fraction of it so the next walk is
+# many stores away
+EVICT_LOW_WATER = 0.9
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "evicted_bytes": 0}
+_lock = threading.Lock()
+# estimated cache size in bytes and when it was last measured
+_size = {"bytes": None, "measured_at": 0.0}
+
+
+def _incr(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+    conn = get_redis()
+    if conn is not None:
+        try:
+            conn.hincrby(STATS_KEY, name, amount)
+        except Exception:
+            mark_redis_down()
+
+
+def stats():
+    """Return cache counters, preferring the shared Redis totals."""
+    conn = get_redis()
+    if conn is not None:
+        try:
+            raw = conn.hgetall(STATS_KEY)
+            if raw:
+                out = {k: 0 for k in _stats}
+                out.update({k.decode(): int(v) for k, v in raw.items()})
+                return out
+        except Exception:
+            mark_redis_down()
+    with _lock:
+        return dict(_stats)
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_identity(path):
+    """Cheap identity for a source file: resolved path, size and mtime.
+
+    Hashing multi-GB sources on every render would cost more than the cache
+    saves; any rewrite of the file changes size or mtime.
+    """
+    st = os.stat(path)
+    return [os.path.realpath(path), st.st_size, st.st_mtime_ns]
+
+
+def render_key(source, start, end, srt_path, signature):
+    """Cache key for a render, or None when the inputs cannot be identified.
+
+    signature: dict describing the filter graph and encoder settings.
+    """
+    try:
+        parts = {
+            "source": source_identity(source),
+            "start": round(float(start), 3),
+            "end": round(float(end), 3),
+            "subtitles": _file_sha256(srt_path) if srt_path else None,
+            "signature": signature,
+        }
+    except (OSError, TypeError, ValueError):
+        return None
+    blob = json.dumps(parts, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _artifact_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.mp4")
+
+
+def partial_path(path):
+    """Temporary sibling of `path` that keeps the extension ffmpeg needs."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.partial-{os.getpid()}-{threading.get_ident()}{ext}"
+
+
+def _place(src, dest):
+    # hard link when possible so the cache costs no extra disk; the final
+    # os.replace makes the new file appear atomically
+    d = os.path.dirname(dest)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        # already the same inode; rename() between two links of one file
+        # is a no-op and would leave the temporary link behind
+        return
+    tmp = partial_path(dest)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def fetch(key, output_path):
+    """Materialize a cached artifact at `output_path`. Returns True on a hit."""
+    if not key:
+        return False
+    cached = _artifact_path(key)
+    try:
+        _place(cached, output_path)
+        # bump mtime: eviction order is by last use
+        os.utime(cached)
+    except OSError:
+        _incr("misses")
+        return False
+    _incr("hits")
+    return True
+
+
+def store(key, output_path):
+    """Add a finished render to the cache, evicting once it is over budget."""
+    if not key or not os.path.exists(output_path):
+        return
+    if os.path.getsize(output_path) == 0:
+        return
+    try:
+        _place(output_path, _artifact_path(key))
+    except OSError:
+        return
+    _incr("stores")
+    _note_stored(os.path.getsize(output_path))
+
+
+def _note_stored(nbytes):
+    # walk the cache only when the running total says it is over budget (or
+    # the total is stale), not after every store
+    now = time.monotonic()
+    with _lock:
+        fresh = (
+            _size["bytes"] is not None and now - _size["measured_at"] < RESCAN_SECONDS
+        )
+        if fresh:
+            _size["bytes"] += nbytes
+            fresh = _size["bytes"] <= CACHE_BUDGET_BYTES
+    if not fresh:
+        evict()
+
+
+def evict(budget_bytes=None):
+    """Remove least-recently-used artifacts once the cache exceeds the budget.
+
+    Evicts down to EVICT_LOW_WATER of the budget.
+    """
+    budget = CACHE_BUDGET_BYTES if budget_bytes is None else budget_bytes
+    entries = []
+    total = 0
+    for root, _dirs, files in os.walk(CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if ".partial-" in name:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    if total <= budget:
+        _remember_size(total)
+        return 0
+    entries.sort()
+    removed = 0
+    target = budget * EVICT_LOW_WATER
+    for _mtime, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        _incr("evictions")
+        _incr("evicted_bytes", size)
+    _remember_size(total)
+    return removed
+
+
+def _remember_size(total):
+    with _lock:
+        _size["bytes"] = total
+        _size["measured_at"] = time.monotonic()
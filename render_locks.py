@@ -0,0 +1,140 @@
+"""Coalescing of duplicate render requests and per-artifact render locks.
+
+Two layers keep several workers from encoding the same clip at once:
+
+- `claim_inflight` records which job renders a clip with a given set of
+  render parameters (Redis SET NX with a TTL), so repeated requests get the
+  existing job id back instead of queueing another job.
+- `artifact_lock` is a distributed lock around producing one render artifact;
+  whoever gets it second finds the finished result in the render cache.
+
+Without Redis both fall back to process-local state, which still covers the
+BackgroundTasks fallback where every render runs inside the web process.
+Redis is tried again after a short backoff (see `redis_client`).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from redis_client import get_redis, mark_redis_down
+
+# safety expiry for claims and locks whose worker died without releasing them
+INFLIGHT_TTL = int(os.environ.get("CLIPFORGE_RENDER_INFLIGHT_TTL", "3600"))
+LOCK_TTL = int(os.environ.get("CLIPFORGE_RENDER_LOCK_TTL", "3600"))
+INFLIGHT_PREFIX = "clipforge:render:inflight:"
+LOCK_PREFIX = "clipforge:render:lock:"
+# Claims are taken before their job is enqueued (render_batch claims a whole
+# group first), so a holder whose job can't be found yet is only treated as
+# dead once the claim is older than this.
+CLAIM_GRACE = float(os.environ.get("CLIPFORGE_RENDER_CLAIM_GRACE", "30"))
+
+# delete the key only while it still holds our token
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_local_inflight = {}  # key -> (job_id, expires_at, claimed_at)
+_local_locks = {}  # artifact name -> threading.Lock
+_lock = threading.Lock()
+
+
+def inflight_key(clip_id, params):
+    """Claim key for rendering `clip_id` with `params` (a JSON-able dict)."""
+    blob = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    return f"{INFLIGHT_PREFIX}{clip_id}:{hashlib.sha256(blob).hexdigest()[:16]}"
+
+
+def _try_claim(key, job_id):
+    # returns (holder, seconds it has held the claim); holder None: claimed
+    conn = get_redis()
+    if conn is not None:
+        try:
+            for _ in range(2):
+                if conn.set(key, job_id, nx=True, ex=INFLIGHT_TTL):
+                    return None, 0.0
+                holder, ttl = conn.pipeline().get(key).ttl(key).execute()
+                if holder is not None:
+                    return holder.decode(), INFLIGHT_TTL - max(ttl, 0)
+                # expired between SET and GET: try once more
+            if conn.set(key, job_id, nx=True, ex=INFLIGHT_TTL):
+                return None, 0.0
+            return "", 0.0
+        except Exception:
+            mark_redis_down()
+    now = time.monotonic()
+    with _lock:
+        holder = _local_inflight.get(key)
+        if holder and holder[1] > now:
+            return holder[0], now - holder[2]
+        _local_inflight[key] = (job_id, now + INFLIGHT_TTL, now)
+        return None, 0.0
+
+
+def claim_inflight(key, job_id, is_alive=None):
+    """Record `job_id` as the render in flight for `key`.
+
+    Returns None when the claim succeeded, otherwise the id of the job that
+    already holds it. is_alive: optional callable(job_id) -> bool; a holder
+    that is no longer queued or running (e.g. its worker crashed) is replaced,
+    unless its claim is younger than CLAIM_GRACE.
+    """
+    holder, held = _try_claim(key, job_id)
+    if holder is None or is_alive is None or held < CLAIM_GRACE:
+        return holder
+    if is_alive(holder):
+        return holder
+    release_inflight(key, holder)
+    return _try_claim(key, job_id)[0]
+
+
+def release_inflight(key, job_id):
+    """Drop the claim on `key` if `job_id` still holds it."""
+    conn = get_redis()
+    if conn is not None:
+        try:
+            conn.eval(_RELEASE_SCRIPT, 1, key, job_id)
+            return
+        except Exception:
+            mark_redis_down()
+    with _lock:
+        holder = _local_inflight.get(key)
+        if holder and holder[0] == job_id:
+            del _local_inflight[key]
+
+
+@contextmanager
+def artifact_lock(name, timeout=LOCK_TTL):
+    """Hold the exclusive right to produce artifact `name`; blocks until free.
+
+    timeout: seconds after which Redis drops the lock of a dead holder.
+    """
+    conn = get_redis()
+    lock = None
+    if conn is not None:
+        try:
+            lock = conn.lock(LOCK_PREFIX + name, timeout=timeout, sleep=0.2)
+            lock.acquire(blocking=True)
+        except Exception:
+            mark_redis_down()
+            lock = None
+    if lock is not None:
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # expired and possibly taken over; nothing left to release
+                pass
+        return
+    with _lock:
+        local = _local_locks.setdefault(name, threading.Lock())
+    with local:
+        yield
@@ -0,0 +1,171 @@
+"""CPU-aware scheduling for batches of ffmpeg renders.
+
+A fixed pool of 4 renders oversubscribes small hosts and leaves big ones idle,
+because every libx264 process also starts its own thread pool sized to the
+whole machine. The scheduler instead picks a per-job `-threads` value and
+launches jobs only while their threads fit into the cores that are free.
+
+- Cores come from the process CPU affinity (so container limits are honoured).
+- Other load on the host (other workers, the web process) is estimated from
+  the 1-minute load average minus our own running threads, and shrinks the
+  number of concurrent jobs.
+- Per-thread-count render speed (media seconds per wall second) is measured
+  on every job and persisted, so later batches pick the thread count with the
+  best estimated host throughput: (free cores // threads) * speed(threads).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_PATH = os.environ.get(
+    "CLIPFORGE_SCHEDULER_STATE",
+    os.path.join(os.path.dirname(__file__), "outputs", "render_scheduler.json"),
+)
+
+# thread counts worth trying; x264 scales poorly past ~8 threads per 1080p job
+THREAD_CANDIDATES = (1, 2, 4, 6, 8, 12, 16)
+DEFAULT_THREADS = 4
+# weight of the newest measurement in the running average
+EWMA_ALPHA = 0.3
+
+
+def available_cores():
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def host_load():
+    """1-minute load average, or 0.0 where the platform has none (Windows)."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class RenderScheduler:
+    def __init__(self, cores=None, state_path=STATE_PATH):
+        self.cores = cores or available_cores()
+        self.state_path = state_path
+        self.candidates = [t for t in THREAD_CANDIDATES if t <= self.cores] or [1]
+        self._lock = threading.Lock()
+        self._speed = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return {int(k): float(v) for k, v in raw.get(str(self.cores), {}).items()}
+        except Exception:
+            return {}
+
+    def _save_state(self):
+        try:
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            except Exception:
+                raw = {}
+            raw[str(self.cores)] = {str(k): v for k, v in self._speed.items()}
+            d = os.path.dirname(self.state_path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            tmp = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(raw, f)
+            os.replace(tmp, self.state_path)
+        except Exception:
+            pass
+
+    def free_cores(self, own_threads=0):
+        """Cores not claimed by other processes on the host."""
+        external = max(0.0, host_load() - own_threads)
+        return max(1, int(round(self.cores - external)))
+
+    def choose_threads(self, free=None):
+        """Thread count with the best estimated host throughput.
+
+        Untried candidates are measured first, starting nearest the default.
+        """
+        free = free or self.cores
+        usable = [t for t in self.candidates if t <= free] or [self.candidates[0]]
+        with self._lock:
+            untried = [t for t in usable if t not in self._speed]
+            if untried:
+                return min(untried, key=lambda t: abs(t - DEFAULT_THREADS))
+            return max(usable, key=lambda t: (free // t) * self._speed[t])
+
+    def record(self, threads, media_seconds, wall_seconds):
+        if wall_seconds <= 0 or media_seconds <= 0:
+            return
+        speed = media_seconds / wall_seconds
+        with self._lock:
+            prev = self._speed.get(threads)
+            self._speed[threads] = (
+                speed if prev is None else prev + EWMA_ALPHA * (speed - prev)
+            )
+
+    def stats(self):
+        with self._lock:
+            return {"cores": self.cores, "speed_by_threads": dict(self._speed)}
+
+    def run(self, tasks, fn, media_seconds=None):
+        """Run `fn(task, threads)` for every task; results are in task order.
+
+        media_seconds: optional callable giving the clip length of a task, used
+        to measure throughput.
+        """
+        results = [None] * len(tasks)
+        pending = deque(enumerate(tasks))
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.cores) as ex:
+            while pending or running:
+                while pending:
+                    used = sum(r[1] for r in running.values())
+                    free = self.free_cores(own_threads=used)
+                    threads = self.choose_threads(free)
+                    # always keep at least one job going
+                    if running and used + threads > free:
+                        break
+                    idx, task = pending.popleft()
+                    fut = ex.submit(fn, task, threads)
+                    running[fut] = (idx, threads, time.monotonic(), task)
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    idx, threads, started, task = running.pop(fut)
+                    try:
+                        results[idx] = fut.result()
+                    except Exception as e:
+                        results[idx] = {"error": str(e)}
+                        continue
+                    if media_seconds is not None and _measurable(results[idx]):
+                        try:
+                            seconds = float(media_seconds(task))
+                        except (TypeError, ValueError):
+                            continue
+                        self.record(threads, seconds, time.monotonic() - started)
+        self._save_state()
+        return results
+
+
+def _measurable(result):
+    # cache hits and failed renders say nothing about encode speed
+    if not isinstance(result, dict):
+        return True
+    return not result.get("skipped") and not result.get("error")
+
+
+_default = None
+
+
+def get_scheduler():
+    """Process-wide scheduler so measurements accumulate across batches."""
+    global _default
+    if _default is None:
+        _default = RenderScheduler()
+    return _default
@@ -1,6 +1,5 @@
 import os
 import sys
-import json
 
 # ensure project root is on sys.path for local script imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -13,8 +12,8 @@ def main():
         path = os.path.abspath(os.path.join("outputs", f"source_{clip_id}.mp4"))
         open(path, "wb").close()
         c = s.query(Clip).filter_by(clip_id=clip_id).first()
-        md = {"source_path": path, "text": f"dummy text for {clip_id}"}
-        c.metadata_json = json.dumps(md)
+        c.source_path = path
+        c.text = f"dummy text for {clip_id}"
         c.renderer_status = "not_rendered"
         print("updated", clip_id, path)
     s.commit()
@@ -0,0 +1,101 @@
+"""Clip inserts per second: `create_clip` per row vs `bulk_upsert_clips`.
+
+Runs against a throwaway SQLite file by default, or any database given with
+--database-url (its clips table must already exist). Each mode writes --clips
+new clips and then upserts the same clip ids again (the re-ingest case), and
+reports rows per second as JSON.
+
+Usage:
+  python scripts/bench_bulk_upsert.py --clips 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def make_records(n, project_id, tag):
+    return [
+        {
+            "clip_id": f"bench-{tag}-{project_id}-{i}",
+            "start": i * 5.0,
+            "end": i * 5.0 + 4.5,
+            "score": float(i % 100),
+            "emotion": "funny",
+            "metadata": {"text": f"segment {i}", "audio_energy": 0.05},
+        }
+        for i in range(n)
+    ]
+
+
+def run_create_clip(db, records, project_id):
+    session = db.SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        for r in records:
+            db.create_clip(
+                session,
+                project_id,
+                r["clip_id"],
+                r["start"],
+                r["end"],
+                r["score"],
+                r["emotion"],
+                r["metadata"],
+            )
+        return time.perf_counter() - t0
+    finally:
+        session.close()
+
+
+def run_bulk(db, records, project_id):
+    session = db.SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        db.bulk_upsert_clips(session, project_id, records)
+        return time.perf_counter() - t0
+    finally:
+        session.close()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", type=int, default=10000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="clipforge_upsert_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import db  # noqa: E402
+
+    db.init_db()
+    results = []
+    for mode, fn, project_id in (
+        ("create_clip", run_create_clip, 900001),
+        ("bulk_upsert_clips", run_bulk, 900002),
+    ):
+        records = make_records(args.clips, project_id, mode)
+        for phase in ("insert", "update"):
+            seconds = fn(db, records, project_id)
+            results.append(
+                {
+                    "mode": mode,
+                    "phase": phase,
+                    "clips": len(records),
+                    "seconds": round(seconds, 3),
+                    "rows_per_second": round(len(records) / seconds, 1),
+                }
+            )
+    print(json.dumps({"database": db.engine.dialect.name, "runs": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,92 @@
+"""Compare `emotion_classifier.classify` in a loop with `classify_batch`.
+
+Synthesizes a speech-like track, cuts it into Whisper-sized segments and
+labels them three ways: `classify` per audio slice (librosa features per
+call), `classify_from_features` per segment on precomputed features, and
+one `classify_batch` call on the same features (repeated up to --rows so
+the label step is measurable). Prints timings, speedups and label
+agreement as JSON.
+
+Usage:
+  python scripts/bench_emotion.py --minutes 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from audio_features import compute_track_features, segments_features  # noqa: E402
+from bench_features import make_segments, make_track  # noqa: E402
+from emotion_classifier import (  # noqa: E402
+    classify,
+    classify_batch,
+    classify_from_features,
+)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--sr", type=int, default=22050)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    y = make_track(args.minutes, args.sr)
+    segments = make_segments(len(y) / args.sr)
+    sr = args.sr
+
+    t0 = time.perf_counter()
+    per_slice = [
+        classify(y[int(s["start"] * sr) : int(s["end"] * sr)], sr) for s in segments
+    ]
+    t_slice = time.perf_counter() - t0
+
+    feats = segments_features(compute_track_features(y, sr), segments)
+    rms = np.array([f["audio_energy"] for f in feats])
+    zcr = np.array([f["zcr"] for f in feats])
+    batched_slices = classify_batch(rms, zcr)
+    rms = np.resize(rms, max(args.rows, len(rms)))
+    zcr = np.resize(zcr, len(rms))
+
+    t0 = time.perf_counter()
+    looped = [classify_from_features(rms=r, zcr=z) for r, z in zip(rms, zcr)]
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    batched = classify_batch(rms, zcr)
+    t_batch = time.perf_counter() - t0
+
+    report = {
+        "segments": len(segments),
+        "rows": len(rms),
+        "classify_loop_seconds_per_segment": round(t_slice / len(segments), 5),
+        "features_loop_seconds": round(t_loop, 6),
+        "classify_batch_seconds": round(t_batch, 6),
+        "speedup_vs_classify_per_row": round(
+            (t_slice / len(segments)) / (t_batch / len(rms)), 1
+        ),
+        "speedup_vs_features_loop": round(t_loop / t_batch, 1) if t_batch else None,
+        "batch_equals_features_loop": bool(list(batched) == looped),
+        "batch_equals_classify": round(
+            float(np.mean([a == b for a, b in zip(batched_slices, per_slice)])), 4
+        ),
+        "repeat_identical": bool(
+            list(classify_batch(rms, zcr)) == list(batched)
+            and [
+                classify(y[int(s["start"] * sr) : int(s["end"] * sr)], sr)
+                for s in segments[:50]
+            ]
+            == per_slice[:50]
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+"""Compare per-segment librosa features with the whole-track feature engine.
+
+Synthesizes a speech-like track (noise bursts with pauses), cuts it into
+Whisper-sized segments and computes energy, speech markers and emotion
+both ways: the old per-slice librosa calls from `process_audio_for_project`
+and `audio_features`. Prints timings, speedup and how far the values differ
+as JSON.
+
+Usage:
+  python scripts/bench_features.py --minutes 30 --sr 22050
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from audio_features import compute_track_features, segment_features  # noqa: E402
+from emotion_classifier import classify, classify_from_features  # noqa: E402
+
+
+def make_track(minutes, sr, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * sr)
+    y = rng.standard_normal(n).astype(np.float32)
+    # syllable-rate loudness changes with pauses well below the 30 dB
+    # speech-marker threshold (a level right at it makes every frame a coin toss)
+    step = sr // 5
+    levels = rng.choice([0.002, 0.03, 0.08, 0.15], size=n // step + 1)
+    y *= np.repeat(levels, step)[:n].astype(np.float32)
+    return y
+
+
+def make_segments(duration, seed=0):
+    rng = np.random.default_rng(seed)
+    segments, t = [], 0.0
+    while t < duration - 1.0:
+        length = float(rng.uniform(2.0, 12.0))
+        segments.append(
+            {"start": round(t, 3), "end": round(min(duration, t + length), 3)}
+        )
+        t += length
+    return segments
+
+
+def per_segment(y, sr, segments):
+    """The pre-`audio_features` path: librosa on every slice."""
+    import librosa
+
+    out = []
+    for seg in segments:
+        audio_slice = y[int(seg["start"] * sr) : int(seg["end"] * sr)]
+        if len(audio_slice) == 0:
+            out.append((0.0, 0, "unknown"))
+            continue
+        energy = float(np.mean(librosa.feature.rms(y=audio_slice)))
+        markers = len(librosa.effects.split(audio_slice, top_db=30))
+        out.append((energy, markers, classify(audio_slice, sr)))
+    return out
+
+
+def whole_track(y, sr, segments):
+    track = compute_track_features(y, sr)
+    out = []
+    for seg in segments:
+        f = segment_features(track, seg["start"], seg["end"])
+        emotion = (
+            "unknown"
+            if f["empty"]
+            else classify_from_features(rms=f["audio_energy"], zcr=f["zcr"])
+        )
+        out.append((f["audio_energy"], f["speech_markers"], emotion))
+    return out
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--sr", type=int, default=22050)
+    args = parser.parse_args(argv)
+
+    y = make_track(args.minutes, args.sr)
+    segments = make_segments(len(y) / args.sr)
+
+    t0 = time.perf_counter()
+    old = per_segment(y, args.sr, segments)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = whole_track(y, args.sr, segments)
+    t_new = time.perf_counter() - t0
+
+    energy_rel = [abs(a[0] - b[0]) / a[0] for a, b in zip(old, new) if a[0] > 0]
+    report = {
+        "minutes": args.minutes,
+        "segments": len(segments),
+        "per_segment_seconds": round(t_old, 3),
+        "whole_track_seconds": round(t_new, 3),
+        "speedup": round(t_old / t_new, 1) if t_new else None,
+        "energy_max_rel_diff": round(max(energy_rel, default=0.0), 4),
+        "energy_mean_rel_diff": round(float(np.mean(energy_rel or [0.0])), 4),
+        "speech_markers_equal": round(
+            sum(a[1] == b[1] for a, b in zip(old, new)) / len(segments), 4
+        ),
+        "speech_markers_within_1": round(
+            sum(abs(a[1] - b[1]) <= 1 for a, b in zip(old, new)) / len(segments), 4
+        ),
+        "emotion_equal": round(
+            sum(a[2] == b[2] for a, b in zip(old, new)) / len(segments), 4
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
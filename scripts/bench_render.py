@@ -0,0 +1,249 @@
+"""Offline benchmark for the render engine on synthetic sources.
+
+Generates test sources with ffmpeg lavfi (every combination of --sizes,
+--durations and --gops), then runs each render path for each encoder preset
+and worker count:
+
+- short:     `render_short`, one clip after another
+- parallel:  `render_clips_parallel` with a fixed pool of N workers
+- longform:  `assemble_from_segments`, full re-encode and smart cut, with
+             every segment from the source, every other segment from a
+             video-only copy of it, and all from the video-only copy
+
+Every run happens in a fresh child process so CPU time and peak RSS (of the
+ffmpeg processes, via RUSAGE_CHILDREN) belong to that run alone, and starts
+with an empty render cache. Results are printed (or written with --out) as
+JSON: wall seconds, CPU seconds, peak RSS in MiB, and output frames per wall
+second.
+
+Usage:
+  python scripts/bench_render.py --sizes 1280x720,1920x1080 --durations 60 \\
+      --gops 60,250 --presets ultrafast,fast --workers 1,2,4 --out bench.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from compare_render_pools import make_source  # noqa: E402
+
+SOURCE_FPS = 30
+PATHS = ("short", "parallel", "longform")
+# longform segments with audio: all, alternating with a video-only copy, none
+AUDIO_MODES = ("all", "mixed", "none")
+
+
+def _clip_ranges(duration, clips, clip_seconds):
+    step = max(clip_seconds, (duration - clip_seconds) / max(1, clips))
+    ranges = []
+    for i in range(clips):
+        start = round(i * step, 3)
+        if start + clip_seconds > duration:
+            break
+        ranges.append((start, start + clip_seconds))
+    return ranges
+
+
+def _short_tasks(cfg, workdir):
+    from srt_util import segments_to_srt
+
+    tasks = []
+    ranges = _clip_ranges(cfg["duration"], cfg["clips"], cfg["clip_seconds"])
+    for i, (start, end) in enumerate(ranges):
+        srt = os.path.join(workdir, f"{i}.srt")
+        segments_to_srt([{"start": start, "end": end, "text": f"clip {i}"}], srt)
+        tasks.append(
+            {
+                "input_path": cfg["source"],
+                "start": start,
+                "end": end,
+                "srt_path": srt,
+                "output_path": os.path.join(workdir, f"{i}.mp4"),
+            }
+        )
+    return tasks
+
+
+def _strip_audio(path):
+    out = path.replace(".mp4", "_noaudio.mp4")
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", path, "-an", "-c", "copy", out],
+        check=True,
+    )
+    return out
+
+
+def _segment_source(cfg, i):
+    audio = cfg.get("audio", "all")
+    if audio == "none" or (audio == "mixed" and i % 2):
+        return cfg["video_only_source"]
+    return cfg["source"]
+
+
+def run_one(cfg):
+    """Run a single configuration in this process and return its measurements."""
+    import ffmpeg_renderer
+    import render_cache
+    import smart_cut
+
+    workdir = tempfile.mkdtemp(prefix="clipforge_bench_run_")
+    render_cache.CACHE_DIR = os.path.join(workdir, "cache")
+    preset = cfg["preset"]
+    ffmpeg_renderer.SHORT_ENCODER_ARGS = ["-c:v", "libx264", "-preset", preset]
+    ffmpeg_renderer.SHORT_ENCODER_ARGS += ["-crf", "20"]
+    ffmpeg_renderer.LONGFORM_ENCODER_ARGS = ["-c:v", "libx264", "-preset", preset]
+    ffmpeg_renderer.LONGFORM_ENCODER_ARGS += ["-crf", "20"]
+
+    tasks = _short_tasks(cfg, workdir)
+    extra = {}
+    if cfg["path"] == "longform":
+        # smart cut silently falls back to a re-encode (e.g. without ffprobe)
+        sources = {_segment_source(cfg, i) for i in range(len(tasks))}
+        extra["smart_cut_applied"] = bool(
+            cfg["smart"] and smart_cut.can_smart_cut(sorted(sources))
+        )
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    t0 = time.monotonic()
+    error = None
+    try:
+        if cfg["path"] == "short":
+            for t in tasks:
+                ffmpeg_renderer.render_short(
+                    t["input_path"],
+                    t["start"],
+                    t["end"],
+                    t["srt_path"],
+                    t["output_path"],
+                )
+        elif cfg["path"] == "parallel":
+            results = ffmpeg_renderer.render_clips_parallel(
+                tasks, workers=cfg["workers"]
+            )
+            errors = [r["error"] for r in results if r and r.get("error")]
+            if errors:
+                error = errors[0]
+        else:
+            segments = [
+                {
+                    "source_path": _segment_source(cfg, i),
+                    "start": t["start"],
+                    "end": t["end"],
+                    "title": f"part {i}",
+                }
+                for i, t in enumerate(tasks)
+            ]
+            ffmpeg_renderer.assemble_from_segments(
+                segments,
+                output_path=os.path.join(workdir, "longform.mp4"),
+                smart=cfg["smart"],
+            )
+    except Exception as e:
+        error = str(e)
+    wall = time.monotonic() - t0
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    media = sum(t["end"] - t["start"] for t in tasks)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_div = 1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0
+    return dict(
+        cfg,
+        **extra,
+        clips=len(tasks),
+        media_seconds=round(media, 3),
+        wall_seconds=round(wall, 3),
+        cpu_seconds=round(cpu, 3),
+        peak_rss_mib=round(after.ru_maxrss / rss_div, 1),
+        output_fps=round(media * SOURCE_FPS / wall, 1) if wall else None,
+        error=error,
+    )
+
+
+def _configs(args, sources):
+    for src in sources:
+        for preset in args.presets:
+            base = dict(
+                src,
+                preset=preset,
+                clips=args.clips,
+                clip_seconds=args.clip_seconds,
+            )
+            if "short" in args.paths:
+                yield dict(base, path="short", workers=1)
+            if "parallel" in args.paths:
+                for workers in args.workers:
+                    yield dict(base, path="parallel", workers=workers)
+            if "longform" in args.paths:
+                for audio in AUDIO_MODES:
+                    for smart in (False, True):
+                        yield dict(
+                            base, path="longform", workers=1, smart=smart, audio=audio
+                        )
+
+
+def _csv(kind):
+    return lambda v: [kind(x) for x in v.split(",") if x]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=_csv(str), default=["1280x720", "1920x1080"])
+    parser.add_argument("--durations", type=_csv(int), default=[60])
+    parser.add_argument("--gops", type=_csv(int), default=[60, 250])
+    parser.add_argument("--presets", type=_csv(str), default=["ultrafast", "fast"])
+    parser.add_argument("--workers", type=_csv(int), default=[1, 2, 4])
+    parser.add_argument("--paths", type=_csv(str), default=list(PATHS))
+    parser.add_argument("--clips", type=int, default=4)
+    parser.add_argument("--clip-seconds", type=float, default=8.0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--one", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.one:
+        print(json.dumps(run_one(json.loads(args.one))))
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="clipforge_bench_")
+    sources = []
+    for size in args.sizes:
+        for duration in args.durations:
+            for gop in args.gops:
+                path = os.path.join(workdir, f"src_{size}_{duration}s_g{gop}.mp4")
+                make_source(path, duration, size=size, gop=gop)
+                src = {"source": path, "size": size, "duration": duration, "gop": gop}
+                if "longform" in args.paths:
+                    src["video_only_source"] = _strip_audio(path)
+                sources.append(src)
+
+    runs = []
+    for cfg in _configs(args, sources):
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--one", json.dumps(cfg)],
+            capture_output=True,
+            text=True,
+        )
+        lines = proc.stdout.strip().splitlines()
+        try:
+            result = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            result = dict(cfg, error=(proc.stderr.strip().splitlines() or ["?"])[-1])
+        print(json.dumps(result), file=sys.stderr)
+        runs.append(result)
+
+    report = json.dumps({"runs": runs}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""Time sliding-window candidate generation on a long synthetic transcript.
+
+Builds whole-track frame features directly (no audio decode) for a
+transcript of --segments Whisper-sized segments and runs
+`clip_windows.window_candidates` on it. Prints the number of windows scored,
+candidates kept and timings per stage as JSON.
+
+Usage:
+  python scripts/bench_windows.py --segments 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import clip_windows  # noqa: E402
+from audio_features import HOP_LENGTH, TrackFeatures  # noqa: E402
+
+
+def make_inputs(n_segments, sr, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(2.0, 6.0, size=n_segments)
+    gaps = rng.uniform(0.0, 0.8, size=n_segments)
+    starts = np.cumsum(np.concatenate(([0.0], (lengths + gaps)[:-1])))
+    ends = starts + lengths
+    segments = [
+        {"start": float(s), "end": float(e), "text": f"segment {i}"}
+        for i, (s, e) in enumerate(zip(starts, ends))
+    ]
+    n_samples = int(ends[-1] * sr) + sr
+    n_frames = 1 + n_samples // HOP_LENGTH
+    # loudness that changes a few times per second, with quiet pauses
+    levels = rng.choice([0.002, 0.03, 0.08, 0.15], size=n_frames // 8 + 1)
+    rms = np.repeat(levels, 8)[:n_frames] * rng.uniform(0.8, 1.2, size=n_frames)
+    zcr = rng.uniform(0.02, 0.2, size=n_frames)
+    track = TrackFeatures(rms, zcr, None, sr, HOP_LENGTH, n_samples)
+    return track, segments
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segments", type=int, default=10000)
+    parser.add_argument("--sr", type=int, default=22050)
+    parser.add_argument("--min-seconds", type=float, default=15.0)
+    parser.add_argument("--max-seconds", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    track, segments = make_inputs(args.segments, args.sr)
+    starts = np.array([s["start"] for s in segments])
+    ends = np.array([s["end"] for s in segments])
+
+    t0 = time.perf_counter()
+    first, last = clip_windows.window_bounds(
+        starts, ends, args.min_seconds, args.max_seconds
+    )
+    t_bounds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    clip_windows.window_features(track, starts[first], ends[last])
+    t_features = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    candidates = clip_windows.window_candidates(
+        track, segments, args.min_seconds, args.max_seconds
+    )
+    t_total = time.perf_counter() - t0
+
+    report = {
+        "segments": len(segments),
+        "timeline_hours": round(float(ends[-1]) / 3600, 2),
+        "windows_scored": int(len(first)),
+        "candidates_kept": len(candidates),
+        "bounds_seconds": round(t_bounds, 4),
+        "features_seconds": round(t_features, 4),
+        "total_seconds": round(t_total, 4),
+        "best_score": candidates[0]["score"] if candidates else None,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
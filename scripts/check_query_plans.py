@@ -0,0 +1,230 @@
+"""Fail when a hot query's plan falls back to a full table scan or a sort.
+
+Seeds a throwaway SQLite database (or the database given with
+--database-url, whose schema must be at `alembic upgrade head`) with
+--clips clips and --events events spread over many projects and users, runs
+ANALYZE, then EXPLAINs each query below:
+
+- get_clips_for_project / clip_page: project clips by score
+- clip_page past the scored clips: unscored clips by id
+- render_batch / assemble_longform: approved clips of a project
+- clips of one source file
+- QuotaMiddleware: a user's clip_created events since midnight
+- get_user_analytics_raw: a user's watch_time events
+
+SQLite plans fail on a `SCAN` of a table without an index or a temp B-tree
+for ORDER BY. Postgres plans fail on a Seq Scan or a Sort node. A plan also
+fails when it does not use the index the query was designed for, so
+dropping a composite index is caught even if the planner falls back to a
+single-column one. Prints each plan and verdict as JSON and exits 1 on any
+failure.
+
+Usage:
+  python scripts/check_query_plans.py --clips 200000 --events 200000
+  python scripts/check_query_plans.py --database-url postgresql://... --skip-seed
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+
+PROJECTS = 200
+USERS = 500
+
+
+def seed(db, n_clips, n_events):
+    rng = random.Random(0)
+    session = db.SessionLocal()
+    try:
+        per_project = max(1, n_clips // PROJECTS)
+        for p in range(1, PROJECTS + 1):
+            records = [
+                {
+                    "clip_id": f"plan-{p}-{i}",
+                    "start": i * 5.0,
+                    "end": i * 5.0 + 4.0,
+                    "score": round(rng.uniform(0, 100), 2),
+                    "emotion": rng.choice(["funny", "intense", "cringe"]),
+                    "metadata": {
+                        "text": f"segment {i}",
+                        "source_path": f"/media/source_{p}_{i % 4}.mp4",
+                    },
+                }
+                for i in range(per_project)
+            ]
+            db.bulk_upsert_clips(session, p, records)
+        table = db.Clip.__table__
+        session.execute(
+            table.update().where(table.c.id % 7 == 0).values(approved="approved")
+        )
+        now = datetime.datetime.utcnow()
+        events = [
+            {
+                "user_id": rng.randint(1, USERS),
+                "clip_id": None,
+                "event_type": rng.choice(["clip_created", "watch_time", "render"]),
+                "value": rng.uniform(1, 60),
+                "created_at": now
+                - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            }
+            for _ in range(n_events)
+        ]
+        for i in range(0, len(events), 5000):
+            session.execute(db.Event.__table__.insert(), events[i : i + 5000])
+        session.commit()
+    finally:
+        session.close()
+
+
+def hot_queries(db):
+    from sqlalchemy import func, select, tuple_
+
+    Clip, Event = db.Clip, db.Event
+    midnight = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    # name -> (statement, index it must use)
+    return {
+        "clips_by_score": (
+            select(Clip.id, Clip.clip_id, Clip.score)
+            .where(Clip.project_id == 7)
+            .order_by(Clip.score.desc())
+            .limit(100),
+            "ix_clips_project_score_id",
+        ),
+        "clip_page_next": (
+            select(*db.CLIP_LIST_COLUMNS)
+            .where(
+                Clip.project_id == 7, tuple_(Clip.score, Clip.id) < tuple_(50.0, 1000)
+            )
+            .order_by(Clip.score.desc(), Clip.id.desc())
+            .limit(101),
+            "ix_clips_project_score_id",
+        ),
+        "clip_page_unscored": (
+            select(*db.CLIP_LIST_COLUMNS)
+            .where(Clip.project_id == 7, Clip.score.is_(None), Clip.id < 1000)
+            .order_by(Clip.id.desc())
+            .limit(101),
+            "ix_clips_project_score_id",
+        ),
+        "approved_clips": (
+            select(Clip.id, Clip.clip_id, Clip.source_path).where(
+                Clip.project_id == 7, Clip.approved == "approved"
+            ),
+            "ix_clips_project_approved",
+        ),
+        "clips_by_source": (
+            select(Clip.id, Clip.clip_id).where(
+                Clip.source_path == "/media/source_7_1.mp4"
+            ),
+            "ix_clips_source_path",
+        ),
+        "quota_clip_created_today": (
+            select(func.count(Event.id)).where(
+                Event.user_id == 42,
+                Event.event_type == "clip_created",
+                Event.created_at >= midnight,
+            ),
+            "ix_events_user_type_created",
+        ),
+        "analytics_watch_time": (
+            select(func.sum(Event.value)).where(
+                Event.user_id == 42, Event.event_type == "watch_time"
+            ),
+            "ix_events_user_type_created",
+        ),
+    }
+
+
+def _sqlite_problems(rows):
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and "USING" not in detail:
+            problems.append(f"full scan: {detail}")
+        if "USE TEMP B-TREE" in detail:
+            problems.append(f"sort: {detail}")
+    return problems
+
+
+def _pg_problems(node, out):
+    kind = node.get("Node Type")
+    if kind == "Seq Scan":
+        out.append(f"full scan: {node.get('Relation Name')}")
+    if kind in ("Sort", "Incremental Sort"):
+        out.append(f"sort: {node.get('Sort Key')}")
+    for child in node.get("Plans", []):
+        _pg_problems(child, out)
+    return out
+
+
+def explain(session, stmt):
+    from sqlalchemy import text
+
+    dialect = session.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [r[-1] for r in rows], _sqlite_problems(rows)
+    if dialect.name == "postgresql":
+        raw = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+        return plan, _pg_problems(plan, [])
+    raise SystemExit(f"unsupported dialect: {dialect.name}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", type=int, default=200000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--database-url")
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="clipforge_plans_"), "plans.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import db  # noqa: E402
+    from sqlalchemy import text  # noqa: E402
+
+    if not args.database_url:
+        db.init_db()
+    if not args.skip_seed:
+        seed(db, args.clips, args.events)
+
+    session = db.SessionLocal()
+    try:
+        # planners need statistics to prefer the composite indexes
+        if db.engine.dialect.name == "postgresql":
+            session.execute(text("ANALYZE clips"))
+            session.execute(text("ANALYZE events"))
+        else:
+            session.execute(text("ANALYZE"))
+        session.commit()
+        report, failed = {}, False
+        for name, (stmt, index) in hot_queries(db).items():
+            plan, problems = explain(session, stmt)
+            if index not in json.dumps(plan, default=str):
+                problems.append(f"does not use {index}")
+            report[name] = {"ok": not problems, "problems": problems, "plan": plan}
+            failed = failed or bool(problems)
+    finally:
+        session.close()
+    print(
+        json.dumps(
+            {"database": db.engine.dialect.name, "queries": report},
+            indent=2,
+            default=str,
+        )
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
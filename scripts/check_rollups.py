@@ -0,0 +1,182 @@
+"""Check that the event rollups agree with the raw events.
+
+Seeds a throwaway SQLite database (or the database given with
+--database-url, whose schema must be at `alembic upgrade head`) in two
+parts: --backfilled events inserted straight into the events table and
+picked up by `db.backfill_event_rollups`, then --live events recorded one
+by one through `db.record_event` on top. Event values are fractional
+seconds, so the incremental `value_sum` accumulation is exercised.
+
+Then compares, for every user, `get_user_analytics` (rollups) with
+`get_user_analytics_raw` (events), and for every clip the rollup totals
+with a GROUP BY over its events, and times both user reads. Counts must
+match exactly; sums within --rel-tol, since the rollups add the same values
+in a different order. Prints JSON with the largest relative sum difference
+and exits 1 on any mismatch.
+
+Usage:
+  python scripts/check_rollups.py --backfilled 200000 --live 5000
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+USERS = 200
+CLIPS = 500
+EVENT_TYPES = ("clip_created", "watch_time", "render")
+
+
+def _event(rng, now):
+    return {
+        "user_id": rng.choice([None] + list(range(1, USERS + 1))),
+        "clip_id": rng.choice([None, f"clip-{rng.randint(1, CLIPS)}"]),
+        "event_type": rng.choice(EVENT_TYPES),
+        "value": rng.choice([None, round(rng.uniform(0.01, 600.0), 3)]),
+        "created_at": now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+    }
+
+
+def seed(db, n_backfilled, n_live):
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    session = db.SessionLocal()
+    try:
+        events = [_event(rng, now) for _ in range(n_backfilled)]
+        for i in range(0, len(events), 5000):
+            session.execute(db.Event.__table__.insert(), events[i : i + 5000])
+        session.commit()
+        t0 = time.perf_counter()
+        backfill = db.backfill_event_rollups(session)
+        backfill["seconds"] = round(time.perf_counter() - t0, 3)
+        t0 = time.perf_counter()
+        for _ in range(n_live):
+            e = _event(rng, now)
+            db.record_event(
+                session,
+                user_id=e["user_id"],
+                clip_id=e["clip_id"],
+                event_type=e["event_type"],
+                value=e["value"],
+            )
+        live_ms = (time.perf_counter() - t0) * 1000 / max(1, n_live)
+        return {"backfill": backfill, "record_event_ms": round(live_ms, 3)}
+    finally:
+        session.close()
+
+
+def _rel_diff(a, b):
+    return abs(a - b) / max(abs(a), abs(b)) if a != b else 0.0
+
+
+def _same(raw, rolled, rel_tol):
+    # (count, sum) pairs; None when one side has no row at all
+    if raw is None or rolled is None:
+        return raw == rolled
+    return raw[0] == rolled[0] and math.isclose(raw[1], rolled[1], rel_tol=rel_tol)
+
+
+def clip_mismatches(db, session, rel_tol):
+    from sqlalchemy import func
+
+    Event, Rollup = db.Event, db.ClipEventRollup
+    raw = {
+        (clip_id, event_type): (count, float(total))
+        for clip_id, event_type, count, total in session.query(
+            Event.clip_id,
+            Event.event_type,
+            func.count(Event.id),
+            func.coalesce(func.sum(Event.value), 0.0),
+        )
+        .filter(Event.clip_id.is_not(None))
+        .group_by(Event.clip_id, Event.event_type)
+    }
+    rolled = {
+        (clip_id, event_type): (int(count), float(total))
+        for clip_id, event_type, count, total in session.query(
+            Rollup.clip_id,
+            Rollup.event_type,
+            func.sum(Rollup.count),
+            func.sum(Rollup.value_sum),
+        ).group_by(Rollup.clip_id, Rollup.event_type)
+    }
+    drift = max(
+        (_rel_diff(raw[k][1], rolled[k][1]) for k in set(raw) & set(rolled)),
+        default=0.0,
+    )
+    mismatches = [
+        {
+            "clip_id": k[0],
+            "event_type": k[1],
+            "raw": raw.get(k),
+            "rollup": rolled.get(k),
+        }
+        for k in sorted(set(raw) | set(rolled))
+        if not _same(raw.get(k), rolled.get(k), rel_tol)
+    ]
+    return mismatches, drift
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backfilled", type=int, default=200000)
+    parser.add_argument("--live", type=int, default=5000)
+    parser.add_argument("--rel-tol", type=float, default=1e-9)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="clipforge_rollups_"), "rollups.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import db  # noqa: E402
+
+    if not args.database_url:
+        db.init_db()
+    report = seed(db, args.backfilled, args.live)
+
+    session = db.SessionLocal()
+    try:
+        user_mismatches, drift, raw_s, rollup_s = [], 0.0, 0.0, 0.0
+        for user_id in range(1, USERS + 1):
+            t0 = time.perf_counter()
+            raw = db.get_user_analytics_raw(session, user_id)
+            t1 = time.perf_counter()
+            rolled = db.get_user_analytics(session, user_id)
+            rollup_s += time.perf_counter() - t1
+            raw_s += t1 - t0
+            pair = (raw["clips_created"], raw["watch_time_seconds"])
+            rolled_pair = (rolled["clips_created"], rolled["watch_time_seconds"])
+            drift = max(drift, _rel_diff(pair[1], rolled_pair[1]))
+            if not _same(pair, rolled_pair, args.rel_tol):
+                user_mismatches.append(
+                    {"user_id": user_id, "raw": raw, "rollup": rolled}
+                )
+        clips, clip_drift = clip_mismatches(db, session, args.rel_tol)
+    finally:
+        session.close()
+
+    report.update(
+        {
+            "user_mismatches": user_mismatches,
+            "clip_mismatches": clips[:20],
+            "clip_mismatch_count": len(clips),
+            "max_relative_sum_difference": max(drift, clip_drift),
+            "raw_read_ms": round(raw_s * 1000 / USERS, 3),
+            "rollup_read_ms": round(rollup_s * 1000 / USERS, 3),
+        }
+    )
+    print(json.dumps(report, indent=2))
+    return 1 if user_mismatches or clips else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,122 @@
+"""Compare clips/minute of the fixed render pool against the CPU-aware scheduler.
+
+Generates a synthetic source with ffmpeg lavfi, then renders the same set of
+clips once with `render_batch_parallel(max_workers=N)` and once with the
+scheduler, and prints a JSON summary.
+
+Usage:
+  python scripts/compare_render_pools.py --clips 16 --clip-seconds 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import render_cache  # noqa: E402
+from ffmpeg_worker import render_batch_parallel  # noqa: E402
+from render_scheduler import get_scheduler  # noqa: E402
+from srt_util import segments_to_srt  # noqa: E402
+
+
+def make_source(path, seconds, size="1920x1080", gop=60):
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=30:duration={seconds}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            str(gop),
+            "-c:a",
+            "aac",
+            "-shortest",
+            path,
+        ],
+        check=True,
+    )
+
+
+def make_tasks(workdir, source, label, clips, clip_seconds):
+    tasks = []
+    for i in range(clips):
+        start = i * clip_seconds
+        srt = os.path.join(workdir, f"{label}_{i}.srt")
+        segments_to_srt(
+            [{"start": start, "end": start + clip_seconds, "text": f"clip {i}"}], srt
+        )
+        tasks.append(
+            {
+                "source": source,
+                "start": start,
+                "end": start + clip_seconds,
+                "srt_path": srt,
+                "output_path": os.path.join(workdir, label, f"{i}.mp4"),
+            }
+        )
+    return tasks
+
+
+def timed_run(workdir, label, tasks, max_workers):
+    # a fresh cache directory per run so neither side gets cache hits
+    render_cache.CACHE_DIR = os.path.join(workdir, f"cache_{label}")
+    t0 = time.monotonic()
+    results = render_batch_parallel(tasks, max_workers=max_workers)
+    wall = time.monotonic() - t0
+    errors = sum(1 for r in results if r and r.get("error"))
+    return {
+        "mode": label,
+        "clips": len(tasks),
+        "errors": errors,
+        "wall_seconds": round(wall, 2),
+        "clips_per_minute": round(len(tasks) * 60.0 / wall, 2) if wall else None,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", type=int, default=16)
+    parser.add_argument("--clip-seconds", type=float, default=10.0)
+    parser.add_argument("--fixed-workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="clipforge_pools_")
+    source = os.path.join(workdir, "source.mp4")
+    make_source(source, int(args.clips * args.clip_seconds) + 1)
+
+    summary = [
+        timed_run(
+            workdir,
+            "fixed",
+            make_tasks(workdir, source, "fixed", args.clips, args.clip_seconds),
+            args.fixed_workers,
+        ),
+        timed_run(
+            workdir,
+            "scheduler",
+            make_tasks(workdir, source, "scheduler", args.clips, args.clip_seconds),
+            None,
+        ),
+    ]
+    print(json.dumps({"runs": summary, "scheduler": get_scheduler().stats()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,5 @@
 import traceback
 import os
-import json
 import sys
 
 # ensure project root on path
@@ -15,8 +14,7 @@ def main():
     if not c:
         print("clip s2 not found")
         raise SystemExit(1)
-    md = json.loads(c.metadata_json or "{}")
-    src = md.get("source_path")
+    src = c.source_path
     print("source:", src)
     if not src or not os.path.exists(src):
         print("source missing or not found")
@@ -26,7 +24,7 @@ def main():
     os.makedirs(os.path.dirname(out), exist_ok=True)
     try:
         t = (c.start + c.end) / 2.0
-        res = generate_thumbnail(src, t, md.get("text", ""), out)
+        res = generate_thumbnail(src, t, c.text or "", out)
         print("saved", res)
     except Exception:
         traceback.print_exc()
@@ -3,7 +3,7 @@
 Produces a `dataset/manifest.jsonl` file with lines like:
   {"audio_path": "...", "text": "...", "emotion": "funny", "clip_id": "..."}
 
-It will copy source files into `dataset/media/` if `metadata.source_path` is present.
+It will copy source files into `dataset/media/` if the clip's `source_path` is present.
 """
 
 import os
@@ -24,8 +24,7 @@ def export_dataset(out_dir="dataset"):
         clips = session.query(db.Clip).all()
         with open(manifest_path, "w", encoding="utf-8") as mf:
             for c in clips:
-                md = json.loads(c.metadata_json or "{}")
-                src = md.get("source_path")
+                src = c.source_path
                 dest = None
                 if src and os.path.exists(src):
                     ext = Path(src).suffix
@@ -42,7 +41,7 @@ def export_dataset(out_dir="dataset"):
                     "start": c.start,
                     "end": c.end,
                     "duration": c.duration,
-                    "text": md.get("text"),
+                    "text": c.text,
                     "emotion": c.emotion,
                 }
                 if dest:
@@ -0,0 +1,204 @@
+"""Load-test QuotaMiddleware and count database statements per request.
+
+In-process mode (default) seeds a throwaway SQLite database with free and
+paid users plus clip_created events, then sends --requests requests with
+X-User-Id headers through an app that only has the middleware and a trivial
+route, --concurrency at a time. Every SQL statement issued is counted, so
+the report shows database round trips per request next to throughput and
+latency. --compare also runs the previous middleware (a User lookup and an
+events COUNT per request) on the same data.
+
+With --url the requests go to a running server instead (no statement
+counts). Prints JSON.
+
+Usage:
+  python scripts/load_test_quota.py --requests 20000 --compare
+  python scripts/load_test_quota.py --url http://localhost:8000/ --requests 50000
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+LIMIT = 10
+
+
+def seed(db, users, events_per_user):
+    session = db.SessionLocal()
+    try:
+        for i in range(1, users + 1):
+            session.add(db.User(id=i, email=f"load{i}@example.com", tier=_tier_for(i)))
+        session.commit()
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                "user_id": u,
+                "event_type": "clip_created",
+                "created_at": now - datetime.timedelta(minutes=k),
+            }
+            for u in range(1, users + 1)
+            # every third user is already at the daily limit
+            for k in range(LIMIT if u % 3 == 0 else events_per_user)
+        ]
+        session.execute(db.Event.__table__.insert(), rows)
+        session.commit()
+    finally:
+        session.close()
+
+
+def _tier_for(user_id):
+    return "creator" if user_id % 5 == 0 else "free"
+
+
+def legacy_middleware():
+    """The per-request DB version QuotaMiddleware replaced, for --compare."""
+    import db
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import func
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    class LegacyQuotaMiddleware(BaseHTTPMiddleware):
+        def __init__(self, app, free_limit_per_day=LIMIT):
+            super().__init__(app)
+            self.free_limit_per_day = free_limit_per_day
+
+        async def dispatch(self, request, call_next):
+            user_id = request.headers.get("X-User-Id")
+            if user_id:
+                session = db.SessionLocal()
+                try:
+                    user = session.query(db.User).filter_by(id=int(user_id)).first()
+                    if user and user.tier == "free":
+                        today = datetime.datetime.utcnow().date()
+                        start = datetime.datetime(today.year, today.month, today.day)
+                        cnt = (
+                            session.query(func.count(db.Event.id))
+                            .filter(
+                                db.Event.user_id == user.id,
+                                db.Event.event_type == "clip_created",
+                                db.Event.created_at >= start,
+                            )
+                            .scalar()
+                            or 0
+                        )
+                        if cnt >= self.free_limit_per_day:
+                            return JSONResponse({"detail": "limit"}, status_code=429)
+                finally:
+                    session.close()
+            return await call_next(request)
+
+    return LegacyQuotaMiddleware
+
+
+def make_app(middleware):
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    app.add_middleware(middleware, free_limit_per_day=LIMIT)
+
+    @app.get("/")
+    def index():
+        return {"status": "running"}
+
+    return app
+
+
+async def run(client, url, n_requests, concurrency, users):
+    rng = random.Random(0)
+    user_ids = [rng.randint(1, users) for _ in range(n_requests)]
+    latencies, statuses = [], {}
+    queue = iter(user_ids)
+
+    async def worker():
+        for uid in queue:
+            t0 = time.perf_counter()
+            resp = await client.get(url, headers={"X-User-Id": str(uid)})
+            latencies.append(time.perf_counter() - t0)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "requests": n_requests,
+        "seconds": round(wall, 3),
+        "requests_per_second": round(n_requests / wall, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+async def run_in_process(middleware, args, db):
+    import httpx
+
+    statements = [0]
+
+    def count(*_args, **_kwargs):
+        statements[0] += 1
+
+    from sqlalchemy import event
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        transport = httpx.ASGITransport(app=make_app(middleware))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest"
+        ) as client:
+            report = await run(client, "/", args.requests, args.concurrency, args.users)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    report["db_statements"] = statements[0]
+    report["db_statements_per_request"] = round(statements[0] / args.requests, 4)
+    return report
+
+
+async def run_remote(args):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        return await run(client, args.url, args.requests, args.concurrency, args.users)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events-per-user", type=int, default=3)
+    parser.add_argument("--url")
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        print(json.dumps({"url": args.url, **asyncio.run(run_remote(args))}, indent=2))
+        return 0
+
+    path = os.path.join(tempfile.mkdtemp(prefix="clipforge_quota_"), "quota.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    import db  # noqa: E402
+    from middleware import QuotaMiddleware  # noqa: E402
+
+    db.init_db()
+    seed(db, args.users, args.events_per_user)
+
+    runs = {"counters": asyncio.run(run_in_process(QuotaMiddleware, args, db))}
+    if args.compare:
+        runs["per_request_db"] = asyncio.run(
+            run_in_process(legacy_middleware(), args, db)
+        )
+    print(json.dumps(runs, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,282 @@
+"""Keyframe-aware seek planning for ffmpeg renders.
+
+Placing `-ss` after `-i` makes ffmpeg decode and discard everything before the
+clip start. Instead we probe the keyframe index of a source once, seek the
+input straight to the keyframe at or before the clip start and trim the few
+remaining frames exactly in the filter graph.
+
+The keyframe index is cached in-process and on disk (RQ forks a fresh process
+per job, so the disk copy is what makes "probe once" hold across jobs).
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import namedtuple
+
+HAVE_FFPROBE = shutil.which("ffprobe") is not None
+
+KEYFRAME_CACHE_DIR = os.environ.get(
+    "CLIPFORGE_KEYFRAME_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "outputs", "keyframes"),
+)
+
+# bump when the meaning of stored keyframe times changes
+INDEX_VERSION = 2
+
+# seek: input seek position (a keyframe), offset: clip start relative to seek,
+# duration: clip length
+SeekPlan = namedtuple("SeekPlan", ["seek", "offset", "duration"])
+
+_index_cache = {}
+_rate_cache = {}
+_audio_cache = {}
+_lock = threading.Lock()
+
+
+def _source_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _cache_file(key):
+    blob = json.dumps([INDEX_VERSION, *key]).encode("utf-8")
+    digest = hashlib.sha1(blob).hexdigest()
+    return os.path.join(KEYFRAME_CACHE_DIR, f"{digest}.json")
+
+
+def probe_keyframes(path):
+    """Return sorted keyframe timestamps (seconds) of the first video stream.
+
+    Times are relative to the container start time, the origin input `-ss`
+    counts from (MPEG-TS and MKV sources often start well above zero).
+    Reads packet flags only, so no frames are decoded.
+    """
+    if not HAVE_FFPROBE:
+        return []
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags:format=start_time",
+        "-of",
+        "compact",
+        path,
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except Exception:
+        return []
+    if proc.returncode != 0:
+        return []
+    times = []
+    origin = 0.0
+    for line in proc.stdout.splitlines():
+        section, _, rest = line.strip().partition("|")
+        fields = dict(f.partition("=")[::2] for f in rest.split("|"))
+        try:
+            if section == "format":
+                origin = float(fields.get("start_time", "0"))
+            elif section == "packet" and "K" in fields.get("flags", ""):
+                times.append(float(fields.get("pts_time", "")))
+        except ValueError:
+            continue
+    return sorted(max(0.0, t - origin) for t in times)
+
+
+def get_keyframes(path):
+    """Keyframe index for `path`, probed once per source version and cached."""
+    try:
+        key = _source_key(path)
+    except OSError:
+        return []
+    with _lock:
+        if key in _index_cache:
+            return _index_cache[key]
+
+    cache_file = _cache_file(key)
+    times = None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            times = json.load(f)
+    except Exception:
+        times = None
+
+    if times is None:
+        times = probe_keyframes(path)
+        # only persist real probes; an empty list may just mean ffprobe is missing
+        if times:
+            try:
+                os.makedirs(KEYFRAME_CACHE_DIR, exist_ok=True)
+                tmp = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(times, f)
+                os.replace(tmp, cache_file)
+            except Exception:
+                pass
+
+    with _lock:
+        _index_cache[key] = times
+    return times
+
+
+def keyframe_before(keyframes, t):
+    """Latest keyframe at or before `t` (0.0 when none is known)."""
+    i = bisect.bisect_right(keyframes, t + 1e-6)
+    return keyframes[i - 1] if i > 0 else 0.0
+
+
+def keyframe_after(keyframes, t):
+    """Earliest keyframe at or after `t`, or None."""
+    i = bisect.bisect_left(keyframes, t - 1e-6)
+    return keyframes[i] if i < len(keyframes) else None
+
+
+def plan_seek(path, start, end):
+    """Plan an input seek for the range [start, end] of `path`.
+
+    Without a keyframe index we still input-seek to `start`; ffmpeg then seeks
+    to the previous keyframe itself and decodes up to the exact position.
+    """
+    start = max(0.0, float(start))
+    end = max(start, float(end))
+    keyframes = get_keyframes(path)
+    seek = keyframe_before(keyframes, start) if keyframes else start
+    return SeekPlan(seek=seek, offset=start - seek, duration=end - start)
+
+
+def trim_filters(plan):
+    """Video and audio filter prefixes that cut a planned range exactly.
+
+    Video timestamps are shifted back to source time so filters that rely on
+    absolute times (burned-in SRT subtitles) keep working; callers reset them
+    with `setpts=PTS-STARTPTS` at the end of their chain.
+    """
+    lo = round(plan.offset, 6)
+    hi = round(plan.offset + plan.duration, 6)
+    vtrim = f"trim=start={lo}:end={hi},setpts=PTS+{round(plan.seek, 6)}/TB"
+    atrim = f"atrim=start={lo}:end={hi},asetpts=PTS-STARTPTS"
+    return vtrim, atrim
+
+
+def probe_frame_rate(path):
+    """Video frame rate of `path` as an ffmpeg rational string, or None."""
+    if HAVE_FFPROBE:
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=r_frame_rate",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            rate = out.stdout.strip()
+            if re.fullmatch(r"[1-9][0-9]*/[1-9][0-9]*", rate):
+                return rate
+        except Exception:
+            pass
+    if shutil.which("ffmpeg"):
+        # no ffprobe: read the rate from ffmpeg's input summary
+        try:
+            out = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-i", path],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            m = re.search(r"Video:.*?, ([0-9.]+) fps", out.stderr)
+            if m:
+                return m.group(1)
+        except Exception:
+            pass
+    return None
+
+
+def get_frame_rate(path):
+    try:
+        key = _source_key(path)
+    except OSError:
+        return None
+    with _lock:
+        if key in _rate_cache:
+            return _rate_cache[key]
+    rate = probe_frame_rate(path)
+    with _lock:
+        _rate_cache[key] = rate
+    return rate
+
+
+def probe_has_audio(path):
+    """Whether `path` has an audio stream; True when it can't be probed."""
+    if HAVE_FFPROBE:
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "a:0",
+            "-show_entries",
+            "stream=index",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            if out.returncode == 0:
+                return bool(out.stdout.strip())
+        except Exception:
+            pass
+    if shutil.which("ffmpeg"):
+        # no ffprobe: look for an audio stream in ffmpeg's input summary
+        try:
+            out = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-i", path],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            if re.search(r"Stream #.*: Video:", out.stderr):
+                return re.search(r"Stream #.*: Audio:", out.stderr) is not None
+        except Exception:
+            pass
+    return True
+
+
+def has_audio(path):
+    try:
+        key = _source_key(path)
+    except OSError:
+        return True
+    with _lock:
+        if key in _audio_cache:
+            return _audio_cache[key]
+    audio = probe_has_audio(path)
+    with _lock:
+        _audio_cache[key] = audio
+    return audio
+
+
+def rate_filter(path):
+    """`fps` filter restoring the source rate after `setpts`.
+
+    setpts leaves the output frame rate unknown, and ffmpeg then encodes at
+    its 25 fps default. Timestamps are still on the source grid, so this
+    passes frames through one to one.
+    """
+    rate = get_frame_rate(path)
+    return f",fps={rate}" if rate else ""
@@ -0,0 +1,164 @@
+"""Smart-cut segment extraction for longform assembly.
+
+Only the frames between a cut point and the next keyframe (and between the
+last keyframe and the cut-out point) are re-encoded; everything in between is
+stream-copied. Pieces are written as MPEG-TS so the re-encoded parts carry
+their own in-band SPS/PPS and can be joined with the concat demuxer using
+`-c copy`.
+
+Smart cut needs an H.264 source with AAC audio (re-encoded pieces are
+always AAC), ffprobe for the keyframe index and stream parameters, and
+identical codec parameters across all sources; otherwise the caller falls
+back to a full re-encode.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+from ffmpeg_progress import run_ffmpeg
+from seek_planner import get_keyframes, keyframe_after, keyframe_before
+
+HAVE_FFPROBE = shutil.which("ffprobe") is not None
+
+# pieces shorter than this are dropped (less than a frame at 25fps)
+MIN_PIECE_SECONDS = 0.04
+
+_X264_PROFILES = {
+    "baseline": "baseline",
+    "constrained baseline": "baseline",
+    "main": "main",
+    "high": "high",
+}
+
+_params_cache = {}
+
+
+def probe_stream_params(path):
+    """Codec parameters that must match for stream-copied pieces to concat."""
+    if path in _params_cache:
+        return _params_cache[path]
+    params = None
+    if HAVE_FFPROBE:
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "stream=codec_type,codec_name,profile,level,refs,width,height,"
+            "pix_fmt,r_frame_rate,sample_rate,channels",
+            "-of",
+            "json",
+            path,
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            streams = json.loads(proc.stdout or "{}").get("streams", [])
+        except Exception:
+            streams = []
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+        if video:
+            params = {
+                "video": {
+                    k: video.get(k)
+                    for k in (
+                        "codec_name",
+                        "profile",
+                        "level",
+                        "refs",
+                        "width",
+                        "height",
+                        "pix_fmt",
+                        "r_frame_rate",
+                    )
+                },
+                "audio": (
+                    {k: audio.get(k) for k in ("codec_name", "sample_rate", "channels")}
+                    if audio
+                    else None
+                ),
+            }
+    _params_cache[path] = params
+    return params
+
+
+def can_smart_cut(sources):
+    """True when every source is H.264 (with AAC audio, if any) and all share
+    identical stream parameters."""
+    params = [probe_stream_params(s) for s in sources]
+    if not params or any(p is None for p in params):
+        return False
+    first = params[0]
+    if first["video"].get("codec_name") != "h264":
+        return False
+    if (first["video"].get("profile") or "").lower() not in _X264_PROFILES:
+        return False
+    if first["audio"] and first["audio"].get("codec_name") != "aac":
+        return False
+    return all(p == first for p in params[1:])
+
+
+def plan_pieces(keyframes, start, end):
+    """Split [start, end] into ("encode"|"copy", piece_start, piece_end) parts."""
+    head_end = keyframe_after(keyframes, start)
+    tail_start = keyframe_before(keyframes, end)
+    if head_end is None or head_end >= tail_start or tail_start <= start:
+        # no complete GOP inside the range: re-encode all of it
+        return [("encode", start, end)]
+    pieces = [
+        ("encode", start, head_end),
+        ("copy", head_end, tail_start),
+        ("encode", tail_start, end),
+    ]
+    return [p for p in pieces if p[2] - p[1] >= MIN_PIECE_SECONDS]
+
+
+def _encode_args(params):
+    video = params["video"]
+    args = [
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        "18",
+        "-profile:v",
+        _X264_PROFILES[(video.get("profile") or "").lower()],
+        "-pix_fmt",
+        video.get("pix_fmt") or "yuv420p",
+    ]
+    # copied pieces keep the source's level and reference count; re-encoded
+    # ones must declare the same or some decoders choke at the joins
+    if (video.get("level") or 0) > 0:
+        args += ["-level:v", str(video["level"])]
+    if (video.get("refs") or 0) > 0:
+        args += ["-refs", str(video["refs"])]
+    audio = params.get("audio")
+    if audio:
+        args += ["-c:a", "aac", "-ar", str(audio.get("sample_rate"))]
+        args += ["-ac", str(audio.get("channels"))]
+    return args
+
+
+def extract_segment(src, start, end, out_dir, prefix):
+    """Write the smart-cut pieces of [start, end] from `src`; returns their paths."""
+    params = probe_stream_params(src)
+    keyframes = get_keyframes(src)
+    paths = []
+    for n, (mode, p_start, p_end) in enumerate(plan_pieces(keyframes, start, end)):
+        out = os.path.join(out_dir, f"{prefix}_{n}.ts")
+        if mode == "copy":
+            # input seek lands exactly on the keyframe, so copying is frame exact
+            cmd = ["ffmpeg", "-y", "-ss", str(p_start), "-i", src]
+            cmd += ["-t", str(round(p_end - p_start, 6)), "-c", "copy"]
+        else:
+            seek = keyframe_before(keyframes, p_start)
+            cmd = ["ffmpeg", "-y", "-ss", str(seek), "-i", src]
+            cmd += ["-ss", str(round(p_start - seek, 6))]
+            cmd += ["-t", str(round(p_end - p_start, 6)), *_encode_args(params)]
+        cmd += ["-avoid_negative_ts", "make_zero", "-f", "mpegts", out]
+        run_ffmpeg(cmd, duration=p_end - p_start, label=f"{prefix}_{n}_{mode}")
+        paths.append(out)
+    return paths
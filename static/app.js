@@ -12,10 +12,18 @@ document.addEventListener('click', async (e) => {
     clip.style.opacity = 0.5;
   }
   if (e.target.matches('.render')) {
-    const clip = e.target.closest('.clip');
+    const btn = e.target;
+    const clip = btn.closest('.clip');
     const id = clip.dataset.clipid;
-    await fetch(`/projects/1/clips/${id}/render`, { method: 'POST' });
-    e.target.textContent = 'Queued';
+    // the server coalesces duplicates too; this just avoids the extra request
+    btn.disabled = true;
+    try {
+      const res = await fetch(`/projects/1/clips/${id}/render`, { method: 'POST' });
+      const j = await res.json();
+      btn.textContent = j.status === 'already_queued' ? 'Already queued' : 'Queued';
+    } catch (err) {
+      btn.disabled = false;
+    }
   }
   if (e.target.matches('#assemble')) {
     const btn = e.target;
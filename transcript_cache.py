@@ -0,0 +1,124 @@
+"""Durable cache of Whisper transcripts.
+
+A transcript is identified by the audio content (sha256, shared with
+`feature_store`), the model name and the decode options, so the same source
+ingested for another project or re-ingested after a crash is not
+transcribed again. Entries are JSON files under
+`CLIPFORGE_TRANSCRIPT_CACHE_DIR` holding the segments (with word
+timestamps) and how long the transcription took.
+
+Hit/miss counters and the transcription time saved by hits are kept
+in-process and, when Redis is reachable, mirrored to a Redis hash like the
+render cache counters.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from feature_store import content_hash
+from redis_client import get_redis, mark_redis_down
+
+CACHE_DIR = os.environ.get(
+    "CLIPFORGE_TRANSCRIPT_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "outputs", "transcripts"),
+)
+STATS_KEY = "clipforge:transcript_cache:stats"
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "ms_saved": 0, "ms_spent": 0}
+_lock = threading.Lock()
+
+
+def _incr(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+    conn = get_redis()
+    if conn is not None:
+        try:
+            conn.hincrby(STATS_KEY, name, amount)
+        except Exception:
+            mark_redis_down()
+
+
+def _with_rates(counts):
+    lookups = counts["hits"] + counts["misses"]
+    counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else None
+    counts["seconds_saved"] = round(counts["ms_saved"] / 1000.0, 1)
+    counts["seconds_spent"] = round(counts["ms_spent"] / 1000.0, 1)
+    return counts
+
+
+def stats():
+    """Return cache counters, hit rate and transcription seconds saved."""
+    conn = get_redis()
+    if conn is not None:
+        try:
+            raw = conn.hgetall(STATS_KEY)
+            if raw:
+                out = {k: 0 for k in _stats}
+                out.update({k.decode(): int(v) for k, v in raw.items()})
+                return _with_rates(out)
+        except Exception:
+            mark_redis_down()
+    with _lock:
+        return _with_rates(dict(_stats))
+
+
+def transcript_key(audio_path, model_name, options):
+    """Cache key for transcribing `audio_path`, or None when it can't be read."""
+    try:
+        parts = {
+            "audio": content_hash(audio_path),
+            "model": model_name,
+            "options": options,
+        }
+    except OSError:
+        return None
+    blob = json.dumps(parts, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+def fetch(key):
+    """Cached segments for `key`, or None on a miss."""
+    if not key:
+        return None
+    try:
+        with open(_entry_path(key), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        _incr("misses")
+        return None
+    _incr("hits")
+    _incr("ms_saved", int(entry.get("seconds", 0.0) * 1000))
+    return entry["segments"]
+
+
+def store(key, segments, seconds):
+    """Save the segments of a finished transcription that took `seconds`."""
+    if not key:
+        return
+    path = _entry_path(key)
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            # numpy scalars/arrays can appear in segments (e.g. probabilities)
+            json.dump(
+                {"segments": segments, "seconds": seconds},
+                f,
+                default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o),
+            )
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    _incr("stores")
+    _incr("ms_spent", int(seconds * 1000))
@@ -1,19 +1,232 @@
-try:
-    import whisper
-
-    _whisper_model = whisper.load_model("base")
-
-    def transcribe(audio_path: str):
-        result = _whisper_model.transcribe(audio_path)
-        return result.get("segments", [])
-except Exception:
-
-    def transcribe(audio_path: str):
-        # Fallback stub if whisper isn't installed or fails to load.
-        return [
-            {
-                "start": 0.0,
-                "end": 0.0,
-                "text": "(transcription unavailable - install whisper)",
-            }
-        ]
+"""Whisper transcription.
+
+The model is loaded on first use and kept per process (`get_model`), so
+importing this module is cheap and a long-lived worker loads it once;
+`worker.py` preloads it before forking job processes when that is safe
+(`can_preload`). Long inputs can be cut at silences into chunks that are
+transcribed in spawned processes, each loading its own model with its share
+of the CPU threads, and stitched back onto the source timeline. `transcribe_cached` puts the
+durable `transcript_cache` in front of all of this.
+
+Settings (environment):
+- WHISPER_MODEL: model name, default "base".
+- CLIPFORGE_TRANSCRIBE_WORKERS: processes for long audio; 1 (default) keeps
+  a single sequential pass, 0 means one per CPU core.
+- CLIPFORGE_TRANSCRIBE_CHUNK_SECONDS: target chunk length, default 300.
+- CLIPFORGE_TRANSCRIBE_LONG_SECONDS: shortest input that is chunked, default 600.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+TRANSCRIBE_WORKERS = int(os.environ.get("CLIPFORGE_TRANSCRIBE_WORKERS", "1"))
+CHUNK_SECONDS = float(os.environ.get("CLIPFORGE_TRANSCRIBE_CHUNK_SECONDS", "300"))
+LONG_AUDIO_SECONDS = float(os.environ.get("CLIPFORGE_TRANSCRIBE_LONG_SECONDS", "600"))
+# how far from the target a cut may move to land in a silence
+CUT_SEARCH_SECONDS = 30.0
+WHISPER_SR = 16000
+# passed to model.transcribe; part of the transcript cache key
+DECODE_OPTIONS = {"word_timestamps": True}
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(name=None):
+    """The Whisper model `name`, loaded once per process."""
+    name = name or WHISPER_MODEL
+    with _models_lock:
+        model = _models.get(name)
+        if model is None:
+            import whisper
+
+            model = whisper.load_model(name)
+            _models[name] = model
+    return model
+
+
+def can_preload():
+    """Whether loading the model before RQ forks job processes pays off.
+
+    Not with chunked transcription, whose spawned processes load their own
+    copy, and not on CUDA, which a forked child cannot reinitialise.
+    """
+    if TRANSCRIBE_WORKERS != 1:
+        return False
+    try:
+        import torch
+
+        return not torch.cuda.is_available()
+    except Exception:
+        return True
+
+
+def _unavailable():
+    # Fallback stub if whisper isn't installed or fails to load.
+    return [
+        {
+            "start": 0.0,
+            "end": 0.0,
+            "text": "(transcription unavailable - install whisper)",
+        }
+    ]
+
+
+def plan_chunks(duration, silences, chunk_seconds=None):
+    """(start, end) chunks of about `chunk_seconds`, cut in the middle of the
+    silence nearest each target point when one is close enough."""
+    chunk_seconds = chunk_seconds or CHUNK_SECONDS
+    mids = (
+        np.asarray(silences, dtype=float).reshape(-1, 2).mean(axis=1)
+        if silences is not None
+        else np.zeros(0)
+    )
+    cuts, last = [0.0], 0.0
+    while duration - last > chunk_seconds * 1.5:
+        target = last + chunk_seconds
+        near = mids[(np.abs(mids - target) <= CUT_SEARCH_SECONDS) & (mids > last + 1.0)]
+        cut = float(near[np.argmin(np.abs(near - target))]) if len(near) else target
+        cuts.append(cut)
+        last = cut
+    cuts.append(float(duration))
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _load_chunk(audio_path, start, end):
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-v",
+        "error",
+        "-ss",
+        f"{start:.3f}",
+        "-t",
+        f"{end - start:.3f}",
+        "-i",
+        audio_path,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(WHISPER_SR),
+        "-f",
+        "f32le",
+        "pipe:1",
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, dtype=np.float32)
+
+
+def _shift(segments, offset):
+    for seg in segments:
+        seg["start"] = seg.get("start", 0.0) + offset
+        seg["end"] = seg.get("end", 0.0) + offset
+        for word in seg.get("words") or ():
+            word["start"] = word.get("start", 0.0) + offset
+            word["end"] = word.get("end", 0.0) + offset
+    return segments
+
+
+def _transcribe_chunk(args):
+    audio_path, start, end, model_name = args
+    audio = _load_chunk(audio_path, start, end)
+    if len(audio) == 0:
+        return []
+    result = get_model(model_name).transcribe(audio, **DECODE_OPTIONS)
+    return _shift(result.get("segments", []), start)
+
+
+def _init_chunk_worker(model_name, threads):
+    # runs first in each spawned process: split the cores between workers
+    # before torch starts its thread pools, then load the model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    get_model(model_name)
+
+
+def transcribe_chunked(audio_path, duration, silences, workers, model_name=None):
+    """Transcribe `audio_path` in silence-aligned chunks across `workers`
+    processes; segments come back in source time, ids renumbered.
+
+    Processes are spawned, not forked, so they never inherit a model (or a
+    CUDA context) from the caller.
+    """
+    model_name = model_name or WHISPER_MODEL
+    chunks = plan_chunks(duration, silences)
+    jobs = [(audio_path, s, e, model_name) for s, e in chunks]
+    workers = min(workers, len(jobs))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_chunk_worker,
+        initargs=(model_name, threads),
+    ) as pool:
+        parts = list(pool.map(_transcribe_chunk, jobs))
+    segments = [seg for part in parts for seg in part]
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+    return segments
+
+
+def transcribe(audio_path: str, track=None, workers=None, model_name=None):
+    """Whisper segments (dicts with start, end, text) for `audio_path`.
+
+    track: its `audio_features.TrackFeatures` when already computed (gives the
+    duration and silences for chunking). workers: processes for long audio,
+    default CLIPFORGE_TRANSCRIBE_WORKERS.
+    """
+    if importlib.util.find_spec("whisper") is None:
+        return _unavailable()
+    workers = TRANSCRIBE_WORKERS if workers is None else workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        # decide on chunking before loading the model here: chunks are
+        # transcribed by models in the worker processes
+        if track is None or track.silences is None:
+            from feature_store import get_track_features
+
+            track = get_track_features(audio_path)
+        duration = track.n_samples / float(track.sr)
+        if duration >= LONG_AUDIO_SECONDS:
+            return transcribe_chunked(
+                audio_path, duration, track.silences, workers, model_name
+            )
+    try:
+        model = get_model(model_name)
+    except Exception:
+        return _unavailable()
+    result = model.transcribe(audio_path, **DECODE_OPTIONS)
+    return result.get("segments", [])
+
+
+def transcribe_cached(audio_path: str, track=None, workers=None, model_name=None):
+    """`transcribe` behind the transcript cache (audio hash, model, options)."""
+    import transcript_cache
+
+    model_name = model_name or WHISPER_MODEL
+    key = transcript_cache.transcript_key(audio_path, model_name, DECODE_OPTIONS)
+    segments = transcript_cache.fetch(key)
+    if segments is not None:
+        return segments
+    t0 = time.perf_counter()
+    segments = transcribe(
+        audio_path, track=track, workers=workers, model_name=model_name
+    )
+    if segments != _unavailable():
+        transcript_cache.store(key, segments, time.perf_counter() - t0)
+    return segments
@@ -17,6 +17,17 @@ if __name__ == "__main__":
     # relying on `Connection` context which may be located differently
     # across `rq` versions.
     q = Queue(connection=redis_conn)
+    # load Whisper once here so forked job processes inherit it instead of
+    # loading it per job (skipped for chunked transcription and on CUDA,
+    # see transcription.can_preload)
+    if os.environ.get("CLIPFORGE_PRELOAD_WHISPER", "1") == "1":
+        try:
+            import transcription
+
+            if transcription.can_preload():
+                transcription.get_model()
+        except Exception as e:
+            print(f"Whisper preload skipped: {e}")
     # On Windows (no fork) use SimpleWorker to avoid os.fork usage in Worker
     if os.name == "nt" or not hasattr(os, "fork"):
         worker = SimpleWorker([q], connection=redis_conn)